@@ -0,0 +1,290 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import logging
+import mmap
+import os
+import sys
+import time
+import typing
+
+from lib.classes import (
+    FailureResponse,
+    SOLVER_FAILURE_MESSAGE,
+    SolveResult,
+    SuccessfulResponse,
+    solve_contract_columns,
+)
+from lib.metrics import percentile
+from lib.streaming import (
+    PayloadColumns,
+    build_response,
+    pack_payload,
+    validate_batch_entry,
+)
+
+DEFAULT_CHUNK_SIZE: int = 64  # Number of records sent to a worker process at once
+CHECKPOINT_SUFFIX: str = ".checkpoint"
+
+
+def find_chunks(
+    input_map: mmap.mmap, start_offset: int, chunk_size: int
+) -> typing.Iterator[typing.Tuple[int, int]]:
+    """
+    Yields the start and end byte offsets of consecutive chunks of at most chunk_size lines, beginning at start_offset.
+    Only the newlines are searched for, the records themselves are parsed by the worker processes.
+    """
+    offset: int = start_offset
+    while offset < len(input_map):
+        end_offset: int = offset
+        for _ in range(chunk_size):
+            newline: int = input_map.find(b"\n", end_offset)
+            end_offset = len(input_map) if newline == -1 else newline + 1
+            if end_offset == len(input_map):
+                break
+        yield offset, end_offset
+        offset = end_offset
+
+
+def solve_record(line: bytes) -> typing.Union[SuccessfulResponse, FailureResponse]:
+    """
+    Validates and solves a single record, holding a PayloadBody, with the same rules as the batch endpoint.
+    """
+    try:
+        raw_payload: typing.Any = json.loads(line)
+    except ValueError as error:
+        return FailureResponse(reason=f"JSON decode error: {error}")
+    request_payload: typing.Union[
+        PayloadColumns, FailureResponse
+    ] = validate_batch_entry(raw_payload)
+    if isinstance(request_payload, FailureResponse):
+        return request_payload
+
+    try:
+        solve_result: SolveResult = solve_contract_columns(
+            *pack_payload(request_payload)
+        )
+    except Exception as error:
+        logging.info(f"Record failed: {error!r}")
+        return FailureResponse(reason=SOLVER_FAILURE_MESSAGE)
+    return build_response(request_payload, solve_result)
+
+
+class RecordResult(typing.NamedTuple):
+    """
+    Result of a single record, serialized by the worker process that solved it.
+    """
+
+    line: str
+    failed: bool
+    latency_ms: float
+
+
+def solve_chunk(
+    input_path: str, start_offset: int, end_offset: int
+) -> typing.List[RecordResult]:
+    """
+    Solves the records between two byte offsets of the input file, which is mapped into the memory of the worker
+    process instead of being sent to it. The latency of every record covers its parsing, validation, solve and
+    serialization. Empty lines are skipped.
+    """
+    results: typing.List[RecordResult] = list()
+    with open(input_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as input_map:
+        for line in input_map[start_offset:end_offset].splitlines():
+            if len(line.strip()) == 0:
+                continue
+            start_timestamp: int = time.perf_counter_ns()
+            response: typing.Union[SuccessfulResponse, FailureResponse] = solve_record(
+                line
+            )
+            results.append(
+                RecordResult(
+                    line=response.model_dump_json(exclude_none=True),
+                    failed=isinstance(response, FailureResponse),
+                    latency_ms=(time.perf_counter_ns() - start_timestamp) / (10**6),
+                )
+            )
+    return results
+
+
+def read_checkpoint(checkpoint_path: str, input_path: str) -> typing.Dict[str, int]:
+    """
+    Returns the progress stored by an interrupted run over the same input file, or the progress of a new run.
+    """
+    checkpoint: typing.Dict[str, typing.Any] = {
+        "input_path": os.path.abspath(input_path),
+        "input_offset": 0,
+        "output_offset": 0,
+        "records": 0,
+        "failures": 0,
+    }
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            stored_checkpoint: typing.Dict[str, typing.Any] = json.load(f)
+        if stored_checkpoint["input_path"] != checkpoint["input_path"]:
+            raise ValueError(
+                f"The checkpoint {checkpoint_path} belongs to {stored_checkpoint['input_path']}."
+            )
+        checkpoint.update(stored_checkpoint)
+    return checkpoint
+
+
+def write_checkpoint(checkpoint_path: str, checkpoint: typing.Dict[str, int]) -> None:
+    """
+    Stores the progress of a run, replacing the file atomically so that an interrupted run never leaves a partial
+    checkpoint.
+    """
+    with open(f"{checkpoint_path}.tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+    return None
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    processes: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_path: typing.Optional[str] = None,
+) -> typing.Dict[str, float]:
+    """
+    Solves every record of a JSONL input file, writing the result of every record to the JSONL output file in the order
+    of the input. Chunks of records are solved by a pool of worker processes, or within this process when processes is
+    0.
+
+    The progress is checkpointed after every chunk that is written. A run that finds the checkpoint of an interrupted run
+    continues after the last written chunk, the checkpoint is removed once the run completes. Returns the throughput of
+    the run.
+    """
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1.")
+
+    checkpoint_path = checkpoint_path or f"{output_path}{CHECKPOINT_SUFFIX}"
+    checkpoint: typing.Dict[str, typing.Any] = read_checkpoint(
+        checkpoint_path, input_path
+    )
+    if checkpoint["records"] > 0:
+        logging.info(f"Resuming after {checkpoint['records']} records.")
+
+    latencies_ms: typing.List[float] = list()
+    failures: int = 0
+    start_timestamp: int = time.perf_counter_ns()
+    input_map: typing.Optional[mmap.mmap] = None
+    executor: typing.Optional[concurrent.futures.ProcessPoolExecutor] = (
+        concurrent.futures.ProcessPoolExecutor(processes) if processes > 0 else None
+    )
+    try:
+        with open(input_path, "rb") as input_file, open(
+            output_path, "r+b" if os.path.exists(output_path) else "wb"
+        ) as output_file:
+            # Dropping the results that were written after the last checkpoint
+            output_file.truncate(checkpoint["output_offset"])
+            output_file.seek(checkpoint["output_offset"])
+
+            chunks: typing.Iterable[typing.Tuple[int, int]] = []
+            if os.fstat(input_file.fileno()).st_size > 0:
+                input_map = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+                chunks = find_chunks(input_map, checkpoint["input_offset"], chunk_size)
+
+            # Keeping a bounded number of chunks in flight, the results are written in the order of the chunks
+            max_pending_chunks: int = 2 * processes if executor is not None else 1
+            pending_chunks: typing.Deque[
+                typing.Tuple[int, concurrent.futures.Future]
+            ] = collections.deque()
+            chunks_iterator: typing.Iterator[typing.Tuple[int, int]] = iter(chunks)
+            while True:
+                while len(pending_chunks) < max_pending_chunks:
+                    chunk: typing.Optional[typing.Tuple[int, int]] = next(
+                        chunks_iterator, None
+                    )
+                    if chunk is None:
+                        break
+                    if executor is not None:
+                        future: concurrent.futures.Future = executor.submit(
+                            solve_chunk, input_path, *chunk
+                        )
+                    else:
+                        future = concurrent.futures.Future()
+                        future.set_result(solve_chunk(input_path, *chunk))
+                    pending_chunks.append((chunk[1], future))
+                if len(pending_chunks) == 0:
+                    break
+
+                ## Writing the oldest chunk, then storing the progress
+                end_offset, future = pending_chunks.popleft()
+                chunk_results: typing.List[RecordResult] = future.result()
+                output_file.write(
+                    "".join(f"{i.line}\n" for i in chunk_results).encode()
+                )
+                output_file.flush()
+
+                chunk_failures: int = sum(i.failed for i in chunk_results)
+                failures += chunk_failures
+                latencies_ms.extend(i.latency_ms for i in chunk_results)
+                checkpoint["input_offset"] = end_offset
+                checkpoint["output_offset"] = output_file.tell()
+                checkpoint["records"] += len(chunk_results)
+                checkpoint["failures"] += chunk_failures
+                write_checkpoint(checkpoint_path, checkpoint)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if input_map is not None:
+            input_map.close()
+
+    # Every record was written, so a later run starts over
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    seconds: float = (time.perf_counter_ns() - start_timestamp) / (10**9)
+    return {
+        "records": len(latencies_ms),
+        "failures": failures,
+        "total_records": checkpoint["records"],
+        "seconds": seconds,
+        "records_per_second": len(latencies_ms) / seconds if seconds > 0 else 0,
+        "p50_ms": percentile(latencies_ms, 0.50) if len(latencies_ms) > 0 else 0,
+        "p99_ms": percentile(latencies_ms, 0.99) if len(latencies_ms) > 0 else 0,
+    }
+
+
+def positive_int(value: str) -> int:
+    """
+    Parses a command line argument that must be an integer of at least 1.
+    """
+    number: int = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not an integer of at least 1.")
+    return number
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Solves a JSONL file holding one payload per line, writing one result per line in the same order."
+    )
+    parser.add_argument("input_path")
+    parser.add_argument("output_path")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes, defaults to the number of CPUs. 0 solves within this process.",
+    )
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help=f"Checkpoint file, defaults to the output path followed by {CHECKPOINT_SUFFIX}.",
+    )
+    arguments = parser.parse_args()
+
+    report = run_batch(
+        arguments.input_path,
+        arguments.output_path,
+        arguments.processes,
+        arguments.chunk_size,
+        arguments.checkpoint,
+    )
+    print(json.dumps(report, indent=2), file=sys.stderr)
@@ -0,0 +1,370 @@
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing
+
+os.environ.setdefault(
+    "SPACESHIP_CACHE_SIZE", "0"
+)  # Repeated payloads must be solved every time, instead of being answered by the result cache
+
+from fastapi.testclient import TestClient
+from lib.classes import ContractTable, Manager, SOLVER_ENGINES
+from lib.metrics import percentile
+from lib.profiling import read_spooled_payloads
+from src.main import app
+
+# Workload parameters
+DEFAULT_SIZES: typing.List[int] = [10, 100, 1000, 10**4, 10**5, 10**6]
+QUICK_SIZES: typing.List[int] = [10, 100, 1000, 10**4]
+OVERLAP_DENSITIES: typing.Dict[str, float] = {
+    "sparse": 0.5,
+    "medium": 5.0,
+    "dense": 50.0,
+}  # Expected number of contracts that are active at any hour
+PRICE_DISTRIBUTIONS: typing.List[str] = ["uniform", "heavy_tailed", "constant"]
+MEAN_DURATION: int = 20
+
+# Largest workload that is given to every engine, the search based engines grow exponentially and the flow based
+# engine builds a graph per solve
+ENGINE_SIZE_LIMITS: typing.Dict[str, int] = {
+    "branch_and_bound": 20,
+    "best_first": 50,
+    "min_cost_flow": 10**5,
+}
+API_SIZE_LIMIT: int = (
+    10**4
+)  # Larger payloads are dominated by the JSON encoding of the test client
+
+
+def generate_contracts(
+    size: int, density: float, price_distribution: str, seed: int
+) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+    Generates a reproducible payload of contracts. The start hours are spread uniformly over a horizon that is chosen
+    so that, on average, `density` contracts are active at any hour.
+    """
+    generator: random.Random = random.Random(seed)
+    horizon: int = max(1, int(size * MEAN_DURATION / density))
+
+    contracts: typing.List[typing.Dict[str, typing.Any]] = list()
+    for i in range(size):
+        if price_distribution == "uniform":
+            price: int = generator.randint(1, 100)
+        elif price_distribution == "heavy_tailed":
+            price = int(generator.paretovariate(1.5) * 10)
+        elif price_distribution == "constant":
+            price = 10  # Every schedule with the same number of contracts ties
+        else:
+            raise ValueError(f"Unknown price distribution '{price_distribution}'.")
+
+        contracts.append(
+            {
+                "name": f"contract{i}",
+                "start": generator.randint(0, horizon),
+                "duration": generator.randint(1, 2 * MEAN_DURATION - 1),
+                "price": price,
+            }
+        )
+
+    return contracts
+
+
+def to_contract_table(
+    records: typing.List[typing.Dict[str, typing.Any]]
+) -> ContractTable:
+    return ContractTable.from_columns(
+        [i["start"] for i in records],
+        [i["duration"] for i in records],
+        [i["price"] for i in records],
+        names=[i["name"] for i in records],
+    )
+
+
+# Measures the import of the webserver, its startup (including the warm up, when enabled) and the first request, within
+# a fresh interpreter
+STARTUP_SCRIPT: str = """
+import json, time
+start_timestamp = time.perf_counter_ns()
+from src.main import app
+import_ms = (time.perf_counter_ns() - start_timestamp) / 10**6
+
+from fastapi.testclient import TestClient
+with open("examples/sample_request.json") as f:
+    payload = json.load(f)
+start_timestamp = time.perf_counter_ns()
+with TestClient(app) as client:
+    startup_ms = (time.perf_counter_ns() - start_timestamp) / 10**6
+    start_timestamp = time.perf_counter_ns()
+    client.post("/spaceship/optimize", json=payload)
+    first_request_ms = (time.perf_counter_ns() - start_timestamp) / 10**6
+print(json.dumps({"import_ms": import_ms, "startup_ms": startup_ms, "first_request_ms": first_request_ms}))
+"""
+
+
+def summarize(
+    latencies_ms: typing.List[float], states_visited: int, peak_memory_bytes: int
+) -> typing.Dict[str, float]:
+    return {
+        "p50_ms": percentile(latencies_ms, 0.50),
+        "p90_ms": percentile(latencies_ms, 0.90),
+        "p99_ms": percentile(latencies_ms, 0.99),
+        "states_visited": states_visited,
+        "peak_memory_bytes": peak_memory_bytes,
+    }
+
+
+def benchmark_engine(
+    solver: str,
+    records: typing.List[typing.Dict[str, typing.Any]],
+    repeats: int,
+    **manager_options: typing.Any,
+) -> typing.Dict[str, float]:
+    """
+    Measures the conversion of the records into a ContractTable together with the solve, using the engine directly.
+    The manager options (e.g. ships, top_k) are passed on to every Manager.
+    """
+    Manager(
+        to_contract_table(records), solver=solver, **manager_options
+    ).run()  # Warming up, so that lazily imported modules are not part of the latencies
+
+    latencies_ms: typing.List[float] = list()
+    states_visited: int = 0
+    for _ in range(repeats):
+        start_timestamp: int = time.perf_counter_ns()
+        manager: Manager = Manager(
+            to_contract_table(records), solver=solver, **manager_options
+        )
+        manager.run()
+        latencies_ms.append((time.perf_counter_ns() - start_timestamp) / (10**6))
+        states_visited = manager.engine.total_states_visited
+
+    # Measuring the memory within a separate run, since tracing slows down the solve
+    tracemalloc.start()
+    Manager(to_contract_table(records), solver=solver, **manager_options).run()
+    _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summarize(latencies_ms, states_visited, peak_memory_bytes)
+
+
+def benchmark_api(
+    client: TestClient, records: typing.List[typing.Dict[str, typing.Any]], repeats: int
+) -> typing.Dict[str, float]:
+    """
+    Measures a full request against the optimize endpoint, including validation, dispatch and serialization.
+    """
+    payload: typing.Dict[str, typing.Any] = {"contracts_list": records}
+    latencies_ms: typing.List[float] = list()
+    for _ in range(repeats):
+        start_timestamp: int = time.perf_counter_ns()
+        response = client.post("/spaceship/optimize", json=payload)
+        latencies_ms.append((time.perf_counter_ns() - start_timestamp) / (10**6))
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Unexpected status code {response.status_code}: {response.text}"
+            )
+
+    # The solve happens in another process, so only the memory of the webserver side is traced
+    tracemalloc.start()
+    client.post("/spaceship/optimize", json=payload)
+    _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summarize(latencies_ms, 0, peak_memory_bytes)
+
+
+def benchmark_startup(warm_up: bool, repeats: int) -> typing.Dict[str, float]:
+    """
+    Measures the cold start of a worker process, within a fresh interpreter per repeat. The latency percentiles are the
+    ones of the first request, the import and startup times are medians.
+    """
+    measurements: typing.List[typing.Dict[str, float]] = list()
+    for _ in range(repeats):
+        output: str = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            env={**os.environ, "SPACESHIP_WARM_UP": "1" if warm_up else "0"},
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        measurements.append(json.loads(output.splitlines()[-1]))
+
+    results: typing.Dict[str, float] = summarize(
+        [i["first_request_ms"] for i in measurements], 0, 0
+    )
+    results["import_ms"] = percentile([i["import_ms"] for i in measurements], 0.50)
+    results["startup_ms"] = percentile([i["startup_ms"] for i in measurements], 0.50)
+    return results
+
+
+def run_benchmarks(
+    sizes: typing.List[int],
+    solvers: typing.List[str],
+    repeats: int,
+    include_api: bool,
+    seed: int,
+    include_startup: bool = True,
+) -> typing.Dict[str, typing.Dict[str, float]]:
+    results: typing.Dict[str, typing.Dict[str, float]] = dict()
+    client: typing.Optional[TestClient] = TestClient(app) if include_api else None
+
+    # Measuring the cold start of a worker, with and without the warm up
+    if include_startup:
+        for warm_up in [False, True]:
+            key: str = f"startup/{'warm' if warm_up else 'cold'}"
+            results[key] = benchmark_startup(warm_up, repeats)
+            logging.info(f"{key}: {results[key]}")
+
+    for size in sizes:
+        for density_name, density in OVERLAP_DENSITIES.items():
+            for price_distribution in PRICE_DISTRIBUTIONS:
+                records = generate_contracts(size, density, price_distribution, seed)
+                workload: str = f"n={size}/{density_name}/{price_distribution}"
+
+                # Driving the engines directly
+                for solver in solvers:
+                    if size > ENGINE_SIZE_LIMITS.get(solver, size):
+                        continue
+                    key = f"engine/{solver}/{workload}"
+                    results[key] = benchmark_engine(solver, records, repeats)
+                    logging.info(f"{key}: {results[key]}")
+
+                # Driving the webserver
+                if client is not None and size <= API_SIZE_LIMIT:
+                    key = f"api/{workload}"
+                    results[key] = benchmark_api(client, records, repeats)
+                    logging.info(f"{key}: {results[key]}")
+
+    return results
+
+
+def run_replays(
+    directory: str, repeats: int
+) -> typing.Dict[str, typing.Dict[str, float]]:
+    """
+    Replays the payloads stored by the profile spool of the webserver (SPACESHIP_PROFILE_PATH), each with the engine and
+    the options that it was solved with.
+    """
+    results: typing.Dict[str, typing.Dict[str, float]] = dict()
+    for name, payload in read_spooled_payloads(directory):
+        key: str = f"replay/{name}"
+        results[key] = benchmark_engine(
+            payload["solver"],
+            payload["contracts_list"],
+            repeats,
+            ships=payload.get("ships", 1),
+            top_k=payload.get("top_k", 1),
+        )
+        logging.info(f"{key}: {results[key]}")
+    return results
+
+
+def find_regressions(
+    results: typing.Dict[str, typing.Dict[str, float]],
+    baseline: typing.Dict[str, typing.Dict[str, float]],
+    threshold: float,
+) -> typing.List[str]:
+    """
+    Compares the results against the baseline, a metric regresses once it grows by more than the threshold fraction.
+    """
+    regressions: typing.List[str] = list()
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for metric in [
+            "p50_ms",
+            "states_visited",
+            "peak_memory_bytes",
+            "import_ms",
+            "startup_ms",
+        ]:
+            baseline_value: float = baseline[key].get(metric, 0)
+            if baseline_value > 0 and metrics.get(metric, 0) > baseline_value * (
+                1 + threshold
+            ):
+                regressions.append(
+                    f"{key} {metric}: {baseline_value} -> {metrics[metric]}"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the solver engines over scaled synthetic workloads."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument(
+        "--quick", action="store_true", help=f"Only uses the sizes {QUICK_SIZES}."
+    )
+    parser.add_argument(
+        "--solvers", nargs="+", default=list(SOLVER_ENGINES), choices=SOLVER_ENGINES
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-api", action="store_true")
+    parser.add_argument(
+        "--no-startup",
+        action="store_true",
+        help="Skips the import, startup and first request measurements.",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        metavar="DIR",
+        help="Only replays the payloads stored within a profile spool directory.",
+    )
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Fraction by which a metric may grow before it counts as a regression.",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Stores the results as the new baseline.",
+    )
+    arguments = parser.parse_args()
+
+    logging.getLogger().setLevel(
+        logging.WARNING
+    )  # Silencing the request logs of the webserver, which src.main enables at the INFO level
+    sizes: typing.List[int] = arguments.sizes or (
+        QUICK_SIZES if arguments.quick else DEFAULT_SIZES
+    )
+    if arguments.replay is not None:
+        results = run_replays(arguments.replay, arguments.repeats)
+    else:
+        results = run_benchmarks(
+            sizes,
+            arguments.solvers,
+            arguments.repeats,
+            not arguments.no_api,
+            arguments.seed,
+            not arguments.no_startup,
+        )
+    print(json.dumps(results, indent=2))
+
+    # Storing the baseline when it does not exist yet, or when requested
+    if arguments.update_baseline or not os.path.exists(arguments.baseline):
+        with open(arguments.baseline, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"Baseline stored in {arguments.baseline}.")
+        sys.exit(0)
+
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = find_regressions(results, baseline, arguments.threshold)
+    if len(regressions) > 0:
+        print("Regressions found:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions found.")
@@ -0,0 +1,516 @@
+from __future__ import annotations
+import argparse
+import functools
+import itertools
+import json
+import logging
+import random
+import sys
+import time
+import typing
+
+from lib.classes import (
+    Contract,
+    ContractTable,
+    DynamicProgrammingEngine,
+    Manager,
+    SOLVER_ENGINES,
+    SolverEngine,
+    State,
+    VALUE_THRESHOLD,
+    is_overlaps,
+)
+from lib.metrics import percentile
+
+# The engines are checked against the dp engine, which is the exact reference solver
+REFERENCE_SOLVER: str = DynamicProgrammingEngine.name
+# Engines that break ties exactly like the dp engine, so they must choose the very same contracts
+EXACT_PATH_SOLVERS: typing.List[str] = ["numpy", "timeline"]
+# Largest case given to the search based engines, which grow exponentially
+ENGINE_SIZE_LIMITS: typing.Dict[str, int] = {
+    "branch_and_bound": 12,
+    "best_first": 25,
+}
+DEFAULT_MAX_CONTRACTS: int = 30
+# Largest case checked against every possible schedule, for the fleet and top_k variants that have no reference engine
+BRUTE_FORCE_MAX_CONTRACTS: int = 10
+MAX_FUZZ_SHIPS: int = 3
+MAX_FUZZ_TOP_K: int = 5
+# Cases faster than this are never reported as outliers, since their timings are mostly noise
+MIN_OUTLIER_MS: float = 1
+
+# Shapes of the generated cases, every shape targets an edge case of the engines
+SHAPES: typing.List[str] = [
+    "random",
+    "touching",  # Contracts ending exactly when others start, which do not overlap (see is_overlaps)
+    "zero_prices",
+    "identical",  # Copies of the same few contracts, only their contract numbers differ
+    "nested",
+    "dense",  # Short horizon, as used by the timeline engine
+    "big_values",  # Hours and prices close to the 128 bit limit of the API
+]
+
+
+class FuzzCase(typing.NamedTuple):
+    shape: str
+    seed: int
+    start_hours: typing.List[int]
+    durations: typing.List[int]
+    prices: typing.List[int]
+
+    def to_contract_table(self) -> ContractTable:
+        return ContractTable.from_columns(self.start_hours, self.durations, self.prices)
+
+    def without_contract(self, contract_number: int) -> FuzzCase:
+        return self._replace(
+            **{
+                column: [
+                    value
+                    for i, value in enumerate(getattr(self, column))
+                    if i != contract_number
+                ]
+                for column in ["start_hours", "durations", "prices"]
+            }
+        )
+
+
+def generate_case(shape: str, seed: int, max_contracts: int) -> FuzzCase:
+    """
+    Generates a reproducible case of the given shape, holding between 1 and max_contracts contracts.
+    """
+    generator: random.Random = random.Random(f"{shape}:{seed}")
+    size: int = generator.randint(1, max_contracts)
+    start_hours: typing.List[int] = list()
+    durations: typing.List[int] = list()
+    prices: typing.List[int] = list()
+
+    if shape == "random":
+        for _ in range(size):
+            start_hours.append(generator.randint(0, 4 * size))
+            durations.append(generator.randint(1, 20))
+            prices.append(generator.randint(0, 100))
+    elif shape == "touching":
+        ## Chains of back to back contracts, with low prices so that many schedules tie
+        hour: int = 0
+        for _ in range(size):
+            if generator.random() < 0.2:
+                hour = generator.randint(0, 2 * size)  # Starting a new chain
+            duration: int = generator.randint(1, 5)
+            start_hours.append(hour)
+            durations.append(duration)
+            prices.append(generator.randint(1, 3))
+            hour += duration
+    elif shape == "zero_prices":
+        for _ in range(size):
+            start_hours.append(generator.randint(0, 2 * size))
+            durations.append(generator.randint(1, 10))
+            prices.append(0 if generator.random() < 0.8 else generator.randint(1, 3))
+    elif shape == "identical":
+        distinct_contracts: typing.List[typing.Tuple[int, int, int]] = [
+            (
+                generator.randint(0, 10),
+                generator.randint(1, 10),
+                generator.randint(1, 10),
+            )
+            for _ in range(generator.randint(1, 4))
+        ]
+        for _ in range(size):
+            start_hour, duration, price = generator.choice(distinct_contracts)
+            start_hours.append(start_hour)
+            durations.append(duration)
+            prices.append(price)
+    elif shape == "nested":
+        center: int = 2 * size
+        for _ in range(size):
+            radius: int = generator.randint(1, 2 * size)
+            start_hours.append(center - radius)
+            durations.append(2 * radius)
+            prices.append(generator.randint(1, 4 * radius))
+    elif shape == "dense":
+        for _ in range(size):
+            start_hours.append(generator.randint(0, size))
+            durations.append(generator.randint(1, 3))
+            prices.append(generator.randint(0, 10))
+    elif shape == "big_values":
+        ## Every value stays below VALUE_THRESHOLD, as enforced by the API, while the end hours and the incomes exceed it
+        base_hour: int = 2**127
+        unit: int = 2**100
+        for _ in range(size):
+            start_hours.append(base_hour + generator.randint(0, 20) * unit)
+            durations.append(generator.randint(1, 10) * unit)
+            prices.append(VALUE_THRESHOLD - generator.randint(1, 1000))
+    else:
+        raise ValueError(f"Unknown shape '{shape}'.")
+
+    return FuzzCase(shape, seed, start_hours, durations, prices)
+
+
+def income_of(contracts: typing.Iterable[Contract]) -> int:
+    return sum(i.penalty for i in contracts)
+
+
+def find_path_problem(
+    contract_table: ContractTable, contracts: typing.List[Contract]
+) -> typing.Optional[str]:
+    """
+    Returns the reason why the contracts are not a valid schedule of a single ship, or None if they are distinct
+    contracts of the table that do not overlap.
+    """
+    contract_numbers: typing.List[int] = [i.contract_number for i in contracts]
+    if len(set(contract_numbers)) != len(contract_numbers):
+        return f"Contracts chosen more than once: {sorted(contract_numbers)}"
+    if not set(contract_numbers) <= set(contract_table.contract_numbers.values):
+        return f"Unknown contracts chosen: {sorted(contract_numbers)}"
+
+    path = sorted(contracts, key=lambda x: x.duration_range)
+    for prior, subsequent in zip(path, path[1:]):
+        if is_overlaps(prior.duration_range, subsequent.duration_range):
+            return f"Contracts {prior.contract_number} and {subsequent.contract_number} overlap"
+    return None
+
+
+def enumerate_schedules(
+    contract_table: ContractTable, ships: int = 1
+) -> typing.Iterator[typing.List[Contract]]:
+    """
+    Yields every subset of contracts that never has more than `ships` contracts in flight at the same hour, in
+    O(2^n * n^2). Only meant for the small cases of the brute force checks.
+    """
+    contracts: typing.List[Contract] = list(contract_table)
+    for chosen in itertools.product([False, True], repeat=len(contracts)):
+        subset: typing.List[Contract] = [i for i, j in zip(contracts, chosen) if j]
+        if all(
+            sum(
+                1
+                for i in subset
+                if i.duration_range[0] <= j.duration_range[0] < i.duration_range[1]
+            )
+            <= ships
+            for j in subset
+        ):
+            yield subset
+
+
+def find_problem(
+    contract_table: ContractTable, solver: str, reduce: bool = False
+) -> typing.Optional[str]:
+    """
+    Solves the table with the solver, and returns the reason why the schedule differs from the schedule of the
+    unreduced reference solver, or None if the schedule is equivalent. A schedule is equivalent when its contracts are
+    a valid schedule of the table, and its income equals the income of the reference schedule.
+    """
+    reference_state: State = Manager(
+        contract_table, solver=REFERENCE_SOLVER, reduce=False
+    ).run()
+    try:
+        state: State = Manager(contract_table, solver=solver, reduce=reduce).run()
+    except Exception as error:
+        return f"Raised {error!r}"
+
+    path_problem: typing.Optional[str] = find_path_problem(
+        contract_table, state.contracts
+    )
+    if path_problem is not None:
+        return path_problem
+    if income_of(state.contracts) != income_of(reference_state.contracts):
+        return f"Income {income_of(state.contracts)} instead of {income_of(reference_state.contracts)}"
+    if (
+        solver in EXACT_PATH_SOLVERS
+        and state.get_all_contract_numbers()
+        != reference_state.get_all_contract_numbers()
+    ):
+        return f"Contracts {sorted(state.get_all_contract_numbers())} instead of {sorted(reference_state.get_all_contract_numbers())}"
+    return None
+
+
+def find_fleet_problem(
+    contract_table: ContractTable, solver: str, ships: int
+) -> typing.Optional[str]:
+    """
+    Solves the table for several ships, and returns the reason why the schedule differs from the best schedule found by
+    brute force, or None if every ship flies a valid schedule and the total income is the best one.
+    """
+    try:
+        manager: Manager = Manager(contract_table, solver=solver, ships=ships)
+        state: State = manager.run()
+    except Exception as error:
+        return f"Raised {error!r}"
+
+    if len(manager.ship_paths) > ships:
+        return f"{len(manager.ship_paths)} ship paths instead of at most {ships}"
+    for ship_path in manager.ship_paths:
+        path_problem: typing.Optional[str] = find_path_problem(
+            contract_table, ship_path
+        )
+        if path_problem is not None:
+            return path_problem
+    flown_contracts: typing.List[int] = sorted(
+        i.contract_number for ship_path in manager.ship_paths for i in ship_path
+    )
+    if flown_contracts != sorted(state.get_all_contract_numbers()):
+        return f"Ships fly {flown_contracts} instead of {sorted(state.get_all_contract_numbers())}"
+
+    best_income: int = max(
+        income_of(i) for i in enumerate_schedules(contract_table, ships)
+    )
+    if income_of(state.contracts) != best_income:
+        return f"Income {income_of(state.contracts)} instead of {best_income}"
+    return None
+
+
+def find_top_k_problem(
+    contract_table: ContractTable, solver: str, top_k: int
+) -> typing.Optional[str]:
+    """
+    Solves the table for the top_k best schedules, and returns the reason why they differ from the schedules ranked by
+    brute force (by descending income, then by ascending number of contracts), or None if they match.
+    """
+    try:
+        manager: Manager = Manager(contract_table, solver=solver, top_k=top_k)
+        top_states: typing.List[State] = [
+            manager.run()
+        ] + manager.get_alternative_states()
+    except Exception as error:
+        return f"Raised {error!r}"
+
+    for state in top_states:
+        path_problem: typing.Optional[str] = find_path_problem(
+            contract_table, state.contracts
+        )
+        if path_problem is not None:
+            return path_problem
+    schedules: typing.Set[typing.FrozenSet[int]] = {
+        frozenset(i.get_all_contract_numbers()) for i in top_states
+    }
+    if len(schedules) != len(top_states):
+        return "Schedules returned more than once"
+
+    ranks: typing.List[typing.Tuple[int, int]] = [
+        (-income_of(i.contracts), len(i.contracts)) for i in top_states
+    ]
+    expected_ranks: typing.List[typing.Tuple[int, int]] = [
+        rank
+        for position, rank in enumerate(
+            sorted(
+                (-income_of(i), len(i)) for i in enumerate_schedules(contract_table)
+            )[:top_k]
+        )
+        if position == 0 or rank[0] < 0
+    ]  # Alternatives without income are left out
+    if ranks != expected_ranks:
+        return f"Ranks {ranks} instead of {expected_ranks}"
+    return None
+
+
+def shrink_case(
+    case: FuzzCase,
+    find_case_problem: typing.Callable[[ContractTable], typing.Optional[str]],
+) -> FuzzCase:
+    """
+    Removes contracts from a failing case for as long as the check keeps failing, so that the reported case is small
+    enough to be debugged.
+    """
+    contract_number: int = 0
+    while contract_number < len(case.prices):
+        smaller_case: FuzzCase = case.without_contract(contract_number)
+        contract_table: ContractTable = smaller_case.to_contract_table()
+        if len(contract_table) > 0 and find_case_problem(contract_table) is not None:
+            case = smaller_case
+        else:
+            contract_number += 1
+    return case
+
+
+def time_solve(contract_table: ContractTable, solver: str, repeats: int = 3) -> float:
+    """
+    Returns the fastest of several solves in milliseconds, which filters out most of the pauses unrelated to the solver
+    (e.g. garbage collection).
+    """
+    latencies_ms: typing.List[float] = list()
+    for _ in range(repeats):
+        start_timestamp: int = time.perf_counter_ns()
+        Manager(contract_table, solver=solver).run()
+        latencies_ms.append((time.perf_counter_ns() - start_timestamp) / (10**6))
+    return min(latencies_ms)
+
+
+def run_fuzz(
+    total_cases: int,
+    seed: int,
+    solvers: typing.List[str],
+    max_contracts: int = DEFAULT_MAX_CONTRACTS,
+    outlier_factor: float = 10,
+) -> typing.Dict[str, typing.Any]:
+    """
+    Checks every solver against the reference solver over total_cases generated cases, cycling through the shapes.
+
+    Returns the mismatches (shrunk to a small failing case), together with the timings of every solver. Timings are
+    compared with the reference solver on the same case, and a case counts as an outlier of a solver once this ratio
+    exceeds outlier_factor times the median ratio of the solver, so that slow paths are reported for every engine,
+    whatever its typical speed.
+    """
+    mismatches: typing.List[typing.Dict[str, typing.Any]] = list()
+    timings_ms: typing.Dict[str, typing.List[float]] = {
+        i: list() for i in [REFERENCE_SOLVER, *solvers]
+    }
+    ratios: typing.Dict[str, typing.List[typing.Tuple[float, float, FuzzCase]]] = {
+        i: list() for i in solvers
+    }
+
+    def check_case(
+        case: FuzzCase,
+        solver: str,
+        options: typing.Dict[str, typing.Any],
+        find_case_problem: typing.Callable[[ContractTable], typing.Optional[str]],
+    ) -> bool:
+        """
+        Runs a check on the case, and records the shrunk case as a mismatch when the check fails.
+        """
+        if find_case_problem(case.to_contract_table()) is None:
+            return True
+        shrunk_case: FuzzCase = shrink_case(case, find_case_problem)
+        mismatches.append(
+            {
+                "solver": solver,
+                **options,
+                "shape": case.shape,
+                "seed": case.seed,
+                "problem": find_case_problem(shrunk_case.to_contract_table()),
+                "start_hours": shrunk_case.start_hours,
+                "durations": shrunk_case.durations,
+                "prices": shrunk_case.prices,
+            }
+        )
+        logging.warning(f"{solver} {options} mismatch on {case.shape}:{case.seed}")
+        return False
+
+    for index in range(total_cases):
+        case: FuzzCase = generate_case(
+            SHAPES[index % len(SHAPES)], seed + index, max_contracts
+        )
+        contract_table: ContractTable = case.to_contract_table()
+        reference_ms: float = time_solve(contract_table, REFERENCE_SOLVER)
+        timings_ms[REFERENCE_SOLVER].append(reference_ms)
+
+        for solver in solvers:
+            if len(contract_table) > ENGINE_SIZE_LIMITS.get(
+                solver, len(contract_table)
+            ):
+                continue
+
+            ## Checking the schedule of the original algorithm and of the reduced table, then timing separate solves
+            if not all(
+                check_case(
+                    case,
+                    solver,
+                    {"reduce": reduce},
+                    functools.partial(find_problem, solver=solver, reduce=reduce),
+                )
+                for reduce in [False, True]
+            ):
+                continue
+
+            solver_ms: float = time_solve(contract_table, solver)
+            timings_ms[solver].append(solver_ms)
+            ratios[solver].append(
+                (solver_ms / max(reference_ms, 1e-6), solver_ms, case)
+            )
+
+        ## Checking the fleet and top_k variants against every schedule of the small cases
+        if len(contract_table) > BRUTE_FORCE_MAX_CONTRACTS:
+            continue
+        ships: int = 2 + index % (MAX_FUZZ_SHIPS - 1)
+        top_k: int = 2 + index % (MAX_FUZZ_TOP_K - 1)
+        for solver in [REFERENCE_SOLVER, *solvers]:
+            engine: typing.Type[SolverEngine] = SOLVER_ENGINES[solver]
+            if engine.supports_fleets:
+                check_case(
+                    case,
+                    solver,
+                    {"ships": ships},
+                    functools.partial(find_fleet_problem, solver=solver, ships=ships),
+                )
+            if engine.supports_top_k:
+                check_case(
+                    case,
+                    solver,
+                    {"top_k": top_k},
+                    functools.partial(find_top_k_problem, solver=solver, top_k=top_k),
+                )
+
+    # Finding the cases on which a solver is far slower than usual, relative to the reference solver
+    outliers: typing.List[typing.Dict[str, typing.Any]] = list()
+    for solver, solver_ratios in ratios.items():
+        if len(solver_ratios) == 0:
+            continue
+        median_ratio: float = percentile([i[0] for i in solver_ratios], 0.50)
+        for ratio, solver_ms, case in solver_ratios:
+            if solver_ms >= MIN_OUTLIER_MS and ratio > outlier_factor * median_ratio:
+                outliers.append(
+                    {
+                        "solver": solver,
+                        "shape": case.shape,
+                        "seed": case.seed,
+                        "contracts": len(case.prices),
+                        "ms": solver_ms,
+                        "reference_ratio": ratio,
+                        "median_reference_ratio": median_ratio,
+                    }
+                )
+
+    return {
+        "cases": total_cases,
+        "mismatches": mismatches,
+        "outliers": outliers,
+        "timings": {
+            solver: {
+                "solves": len(values),
+                "p50_ms": percentile(values, 0.50),
+                "p99_ms": percentile(values, 0.99),
+                "max_ms": max(values),
+            }
+            for solver, values in timings_ms.items()
+            if len(values) > 0
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Checks that every solver engine returns the same income as the dp engine, and an equivalent valid path, over random and adversarial cases."
+    )
+    parser.add_argument("--cases", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--solvers",
+        nargs="+",
+        default=[i for i in SOLVER_ENGINES if i != REFERENCE_SOLVER],
+        choices=SOLVER_ENGINES,
+    )
+    parser.add_argument("--max-contracts", type=int, default=DEFAULT_MAX_CONTRACTS)
+    parser.add_argument(
+        "--outlier-factor",
+        type=float,
+        default=10,
+        help="Factor by which a solver may be slower than usual, relative to dp, before a case counts as an outlier.",
+    )
+    parser.add_argument(
+        "--fail-on-outliers",
+        action="store_true",
+        help="Exits with an error when outliers are found, and not only on mismatches.",
+    )
+    arguments = parser.parse_args()
+
+    report = run_fuzz(
+        arguments.cases,
+        arguments.seed,
+        arguments.solvers,
+        arguments.max_contracts,
+        arguments.outlier_factor,
+    )
+    print(json.dumps(report, indent=2))
+
+    if len(report["mismatches"]) > 0 or (
+        arguments.fail_on_outliers and len(report["outliers"]) > 0
+    ):
+        sys.exit(1)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import typing
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+if typing.TYPE_CHECKING:
+    import sqlite3
+
+ContractRecord: typing.TypeAlias = typing.Tuple[
+    str, int, int, int
+]  # Represents the name, start, duration and price of a contract.
+
+
+def fingerprint_contracts(records: typing.Iterable[ContractRecord]) -> str:
+    """
+    Returns a fingerprint of a set of contracts that does not depend on the order in which the contracts were given.
+    """
+    canonical_records: typing.List[typing.Tuple[int, int, int, str]] = sorted(
+        (start, duration, price, name) for name, start, duration, price in records
+    )
+    return hashlib.blake2b(
+        json.dumps(canonical_records, separators=(",", ":")).encode(),
+        digest_size=20,
+    ).hexdigest()
+
+
+class SqliteCacheBackend:
+    """
+    Cache entries stored within a SQLite database file, so that every worker process of the webserver shares the hits.
+    Entries are evicted once they are older than the TTL, or when the number of entries exceeds the maximum size, in
+    which case the least recently used entries are removed.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float) -> None:
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.ttl_seconds: float = ttl_seconds
+
+        # The connection is opened on first use, so that a backend created before the worker processes are forked (e.g.
+        # when the webserver preloads the application) is never shared between them
+        self._connection: typing.Optional[sqlite3.Connection] = None
+        self._connection_pid: typing.Optional[int] = None
+        self._lock: threading.Lock = threading.Lock()
+        return None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Every worker process opens its own connection, the database handles the locking between them
+        if self._connection is None or self._connection_pid != os.getpid():
+            import sqlite3  # Imported on demand, since the backend is only used when a cache path is configured
+
+            self._connection = sqlite3.connect(
+                self.path, timeout=5, check_same_thread=False, isolation_level=None
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)"
+            )
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> typing.Optional[typing.Any]:
+        now: float = time.time()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            self.connection.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(row[0])
+
+    def put(self, key: str, value: typing.Any) -> None:
+        now: float = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+
+            # Evicting the expired and the least recently used entries
+            self.connection.execute(
+                "DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,)
+            )
+            self.connection.execute(
+                "DELETE FROM results WHERE key NOT IN (SELECT key FROM results ORDER BY accessed DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+        return None
+
+
+class ResultCache:
+    """
+    LRU cache of solver results with a time to live, kept within the process. An optional shared backend (e.g. a
+    SqliteCacheBackend) is consulted on local misses and receives every stored result.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        backend: typing.Optional[SqliteCacheBackend] = None,
+    ) -> None:
+        self.max_entries: int = max_entries
+        self.ttl_seconds: float = ttl_seconds
+        self.backend: typing.Optional[SqliteCacheBackend] = backend
+
+        # Entries of (expiry, value), ordered from the least to the most recently used
+        self._entries: collections.OrderedDict[
+            str, typing.Tuple[float, typing.Any]
+        ] = collections.OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        return None
+
+    def get(self, key: str) -> typing.Optional[typing.Any]:
+        if self.max_entries <= 0:
+            return None
+
+        # Checking the entries of the current process
+        entry = self._entries.get(key)
+        if entry is not None:
+            expiry, value = entry
+            if time.monotonic() < expiry:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        # Checking the shared backend
+        if self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                self._store_locally(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: typing.Any) -> None:
+        if self.max_entries <= 0:
+            return None
+        self._store_locally(key, value)
+        if self.backend is not None:
+            self.backend.put(key, value)
+        return None
+
+    def _store_locally(self, key: str, value: typing.Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # Evicting the least recently used entry
+        return None
+
+    def get_statistics(self) -> typing.Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,268 @@
+from __future__ import annotations
+import typing
+import collections
+import glob
+import json
+import math
+import os
+import threading
+import time
+
+# Metrics collected for every solve, in the order that they are reported
+SOLVER_COUNTERS: typing.List[str] = [
+    "nodes_expanded",
+    "nodes_pruned_by_bound",
+    "nodes_rejected_by_overlap",
+    "contracts_removed",
+]
+REQUEST_TIMERS: typing.List[str] = ["validation", "solve", "serialization"]
+
+
+def percentile(values: typing.List[float], fraction: float) -> float:
+    """
+    Returns the nearest rank percentile of a non empty list of values, e.g. fraction=0.99 for the p99.
+    """
+    ordered: typing.List[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def format_sample_name(name: str, labels: typing.Dict[str, str]) -> str:
+    """
+    Returns the Prometheus sample name, e.g. spaceship_solves_total{solver="dp"}.
+    """
+    if len(labels) == 0:
+        return name
+    label_pairs: str = ",".join(f'{key}="{labels[key]}"' for key in sorted(labels))
+    return f"{name}{{{label_pairs}}}"
+
+
+def format_sample_value(value: float) -> str:
+    """
+    Returns the exposition of a sample value, whole numbers are written as integers so that large counters keep every
+    digit (e.g. 1234568 instead of 1.23457e+06).
+    """
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class RequestTrace:
+    """
+    Breakdown of a single request into its validation, solve and serialization time, together with the counters of the
+    solves that it triggered.
+
+    The validation time runs from the start of the request until the payload is validated, the serialization time runs
+    from the last solve (or the validation, if nothing was solved) until the response is sent.
+    """
+
+    def __init__(self) -> None:
+        self.start_timestamp: int = time.perf_counter_ns()
+        self.last_timestamp: typing.Optional[int] = None
+        self.seconds: typing.Dict[str, float] = dict()
+        self.counters: typing.Dict[str, int] = dict.fromkeys(SOLVER_COUNTERS, 0)
+        self.solvers: typing.Counter[str] = collections.Counter()
+        return None
+
+    def mark_validated(self) -> None:
+        self.last_timestamp = time.perf_counter_ns()
+        self.seconds["validation"] = (self.last_timestamp - self.start_timestamp) / (
+            10**9
+        )
+        return None
+
+    def add_solve(self, solve_result: typing.Any) -> None:
+        """
+        Adds the counters and the solve time of a SolveResult, a merged result counts one solve per group.
+        """
+        self.last_timestamp = time.perf_counter_ns()
+        self.seconds["solve"] = (
+            self.seconds.get("solve", 0) + solve_result.solve_seconds
+        )
+        for name in SOLVER_COUNTERS:
+            self.counters[name] += getattr(solve_result, name)
+        self.solvers.update(solve_result.solver_counts or {solve_result.solver: 1})
+        return None
+
+    def finish(self) -> None:
+        if self.last_timestamp is not None and "serialization" not in self.seconds:
+            self.seconds["serialization"] = (
+                time.perf_counter_ns() - self.last_timestamp
+            ) / (10**9)
+        return None
+
+    def to_header(self) -> str:
+        trace: typing.Dict[str, typing.Any] = {
+            f"{name}_ms": round(self.seconds[name] * 1000, 3)
+            for name in REQUEST_TIMERS
+            if name in self.seconds
+        }
+        if len(self.solvers) > 0:
+            trace.update(self.counters)
+            trace["solvers"] = dict(self.solvers)
+        return json.dumps(trace, separators=(",", ":"))
+
+
+class MetricsRegistry:
+    """
+    Counters and timers of a worker process, rendered in the Prometheus text format.
+
+    Every worker process of the webserver keeps its own registry. When a directory is given, each worker also writes a
+    snapshot of its registry into the directory, and the rendered metrics are the sum over every snapshot, so that a
+    scrape of any worker reports the totals of the whole webserver. Requests only update the registry in memory, the
+    snapshot is written by a background thread every flush_interval_seconds (when it changed), so the totals of the
+    other workers lag behind by up to the interval. The directory should be emptied before the webserver starts,
+    otherwise the totals of the previous run are included.
+    """
+
+    def __init__(
+        self, directory: typing.Optional[str] = None, flush_interval_seconds: float = 1
+    ) -> None:
+        self.directory: typing.Optional[str] = directory
+        self.flush_interval_seconds: float = flush_interval_seconds
+        self.counters: typing.Dict[str, float] = collections.defaultdict(float)
+        # Timers are reported as summaries, holding the number of observations and their sum
+        self.timer_counts: typing.Dict[str, int] = collections.defaultdict(int)
+        self.timer_sums: typing.Dict[str, float] = collections.defaultdict(float)
+        self._lock: threading.Lock = threading.Lock()
+
+        # Whether the registry changed since the last snapshot was written
+        self._changed: bool = False
+        # The flusher thread is started on first use by every worker process, since threads do not survive a fork
+        self._flusher: typing.Optional[threading.Thread] = None
+        self._flusher_pid: typing.Optional[int] = None
+        self._stopped: threading.Event = threading.Event()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        return None
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        with self._lock:
+            self.counters[format_sample_name(name, labels)] += value
+        return None
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timer_counts[name] += 1
+            self.timer_sums[name] += seconds
+        return None
+
+    def record_request(self, path: str, status_code: int, trace: RequestTrace) -> None:
+        """
+        Adds a finished request, together with the breakdown of its trace. The snapshot is shared with the other worker
+        processes by the flusher thread.
+        """
+        self.increment("spaceship_requests_total", path=path, status=str(status_code))
+        for name, seconds in trace.seconds.items():
+            self.observe(f"spaceship_{name}_seconds", seconds)
+        if len(trace.solvers) > 0:
+            for name, value in trace.counters.items():
+                self.increment(f"spaceship_{name}_total", value)
+            for solver, solves in trace.solvers.items():
+                self.increment("spaceship_solves_total", solves, solver=solver)
+
+        if self.directory is not None:
+            self._changed = True
+            if self._flusher_pid != os.getpid():
+                self.start_flusher()
+        return None
+
+    def start_flusher(self) -> None:
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._run_flusher, name="metrics-flusher", daemon=True
+        )
+        self._flusher_pid = os.getpid()
+        self._flusher.start()
+        return None
+
+    def _run_flusher(self) -> None:
+        while not self._stopped.wait(self.flush_interval_seconds):
+            if self._changed:
+                self._changed = False
+                self.flush()
+        return None
+
+    def close(self) -> None:
+        """
+        Stops the flusher thread of this worker process and writes the final snapshot.
+        """
+        if self._flusher is not None and self._flusher_pid == os.getpid():
+            self._stopped.set()
+            self._flusher.join()
+            self._flusher = None
+            self._flusher_pid = None
+        if self.directory is not None and self._changed:
+            self._changed = False
+            self.flush()
+        return None
+
+    def get_snapshot(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timer_counts": dict(self.timer_counts),
+                "timer_sums": dict(self.timer_sums),
+            }
+
+    def flush(self) -> None:
+        """
+        Writes the snapshot of this worker process, replacing the file atomically so that readers never see a partial
+        snapshot.
+        """
+        path: str = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self.get_snapshot(), f)
+        os.replace(f"{path}.tmp", path)
+        return None
+
+    def collect(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        """
+        Returns the sum of the snapshots of every worker process, or the snapshot of this process without a directory.
+        """
+        snapshot: typing.Dict[str, typing.Dict[str, float]] = self.get_snapshot()
+        if self.directory is None:
+            return snapshot
+
+        own_path: str = os.path.join(self.directory, f"{os.getpid()}.json")
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            if path == own_path:
+                continue  # The snapshot in memory is more recent
+            try:
+                with open(path) as f:
+                    worker_snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # The worker may have been removed in the meantime
+            for section, samples in worker_snapshot.items():
+                for sample_name, value in samples.items():
+                    snapshot[section][sample_name] = (
+                        snapshot[section].get(sample_name, 0) + value
+                    )
+        return snapshot
+
+    def render(self) -> str:
+        """
+        Renders the collected metrics in the Prometheus text exposition format.
+        """
+        snapshot: typing.Dict[str, typing.Dict[str, float]] = self.collect()
+        lines: typing.List[str] = list()
+
+        ## Grouping the samples by metric name, every metric is preceded by its type
+        counters: typing.Dict[str, typing.List[str]] = collections.defaultdict(list)
+        for sample_name in sorted(snapshot["counters"]):
+            counters[sample_name.split("{")[0]].append(sample_name)
+        for name, sample_names in counters.items():
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(
+                f"{i} {format_sample_value(snapshot['counters'][i])}"
+                for i in sample_names
+            )
+
+        for name in sorted(snapshot["timer_counts"]):
+            lines.append(f"# TYPE {name} summary")
+            lines.append(
+                f"{name}_count {format_sample_value(snapshot['timer_counts'][name])}"
+            )
+            lines.append(f"{name}_sum {snapshot['timer_sums'][name]}")
+
+        return "\n".join(lines) + "\n"
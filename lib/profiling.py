@@ -0,0 +1,105 @@
+from __future__ import annotations
+import typing
+import cProfile
+import glob
+import json
+import marshal
+import os
+import threading
+import time
+from lib.classes import SolveResult, solve_contract_columns
+
+PROFILE_SUFFIX: str = ".prof"
+PAYLOAD_SUFFIX: str = ".json"
+
+
+def profile_contract_columns(*solve_arguments: typing.Any) -> SolveResult:
+    """
+    Runs solve_contract_columns under cProfile. The statistics are returned within the SolveResult, marshalled in the
+    format of pstats.Stats.dump_stats, so that they can be sent back from a solver worker process.
+    """
+    profiler: cProfile.Profile = cProfile.Profile()
+    solve_result: SolveResult = profiler.runcall(
+        solve_contract_columns, *solve_arguments
+    )
+    profiler.create_stats()
+    return solve_result._replace(profile=marshal.dumps(profiler.stats))
+
+
+class ProfileSpool:
+    """
+    Local directory holding the profiles of solves, each stored as a pair of files sharing the same name:
+
+    - <name>.prof: The cProfile statistics, which can be opened using pstats.Stats(path) or tools such as snakeviz.
+    - <name>.json: The payload that was solved, together with its fingerprint and the details of the solve. The file is
+      a valid payload of the optimize endpoint, so that the input can be replayed (e.g. benchmarks.py --replay).
+
+    Names start with the time of the solve, followed by the fingerprint. Once the files take more than max_bytes, the
+    oldest pairs are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self._lock: threading.Lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        return None
+
+    def write(
+        self,
+        fingerprint: str,
+        profile: bytes,
+        payload: typing.Dict[str, typing.Any],
+    ) -> str:
+        """
+        Stores a profile together with its payload, then rotates the spool. Returns the name of the stored pair.
+        """
+        name: str = f"{time.time_ns()}-{os.getpid()}-{fingerprint[:16]}"
+        path: str = os.path.join(self.directory, name)
+        with self._lock:
+            # Writing the payload last, so that every listed payload has its profile
+            with open(f"{path}{PROFILE_SUFFIX}", "wb") as f:
+                f.write(profile)
+            with open(f"{path}{PAYLOAD_SUFFIX}.tmp", "w") as f:
+                json.dump({"fingerprint": fingerprint, **payload}, f)
+            os.replace(f"{path}{PAYLOAD_SUFFIX}.tmp", f"{path}{PAYLOAD_SUFFIX}")
+
+            self.rotate()
+        return name
+
+    def rotate(self) -> None:
+        """
+        Removes the oldest pairs of files until the spool fits within max_bytes.
+        """
+        sizes: typing.Dict[str, int] = dict()
+        for path in glob.glob(os.path.join(self.directory, "*")):
+            name, _ = os.path.splitext(os.path.basename(path))
+            try:
+                sizes[name] = sizes.get(name, 0) + os.path.getsize(path)
+            except OSError:
+                continue  # Removed by another worker process in the meantime
+
+        total_bytes: int = sum(sizes.values())
+        # Names start with the time, so the oldest come first
+        for name in sorted(sizes):
+            if total_bytes <= self.max_bytes:
+                break
+            for suffix in [PROFILE_SUFFIX, PAYLOAD_SUFFIX]:
+                try:
+                    os.remove(os.path.join(self.directory, f"{name}{suffix}"))
+                except OSError:
+                    pass
+            total_bytes -= sizes[name]
+        return None
+
+
+def read_spooled_payloads(
+    directory: str,
+) -> typing.Iterator[typing.Tuple[str, typing.Dict[str, typing.Any]]]:
+    """
+    Yields the name and the payload of every profile within a spool directory, from the oldest to the newest.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, f"*{PAYLOAD_SUFFIX}"))):
+        with open(path) as f:
+            yield os.path.splitext(os.path.basename(path))[0], json.load(f)
@@ -0,0 +1,431 @@
+from __future__ import annotations
+import typing
+import bisect
+import collections
+import os
+import pickle
+import threading
+import time
+from lib.classes import Contract, State, ZERO_PRICES_MESSAGE, DUPLICATE_NAMES_MESSAGE
+
+if typing.TYPE_CHECKING:
+    import sqlite3
+
+SortKey: typing.TypeAlias = typing.Tuple[
+    int, int
+]  # Represents the end hour and the contract number, used to order the contracts.
+
+
+class SessionUpdateError(ValueError):
+    """
+    Raised when an update cannot be applied to a session. The session is left unchanged.
+    """
+
+
+class ScheduleSession:
+    """
+    Optimal schedule of a book of contracts that changes a few entries at a time.
+
+    The contracts are kept sorted by end hour, together with the predecessor and dynamic programming tables of the
+    DynamicProgrammingEngine. The table entry of a sorted position only depends on the entries before it, so an update
+    only refreshes the entries from the earliest sorted position that it touches onwards, in O((n - position) log n).
+    Changes towards the end of the timeline are therefore cheap, regardless of the size of the book, while a change at
+    its start refreshes every entry, like a full solve. The tables are Python lists, so placing or removing a contract
+    also shifts the later entries, in O(n - position) memory moves.
+    """
+
+    # Contracts are weighted as price * weight_scale - 1, so that fewer contracts are preferred on equal incomes. Unlike
+    # the DynamicProgrammingEngine, the scale does not depend on the number of contracts, which changes between updates.
+    weight_scale: int = 2**40
+
+    def __init__(self, contracts: typing.Iterable[Contract]) -> None:
+        self.contracts_by_name: typing.Dict[str, Contract] = dict()
+
+        # Contracts sorted by end hour, with one table entry per sorted position
+        self.sort_keys: typing.List[SortKey] = list()
+        self.sorted_contracts: typing.List[Contract] = list()
+        self.end_hours: typing.List[int] = list()
+        self.predecessors: typing.List[int] = list()
+        self.taken: typing.List[bool] = list()
+        # best_weights[k] holds the optimal weight of the first k sorted contracts
+        self.best_weights: typing.List[int] = [0]
+
+        self.next_contract_number: int = 0
+        self.positive_prices: int = 0  # Number of contracts with a price of > 0
+        # Number of table entries refreshed by the last update
+        self.last_refreshed_entries: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+        # Building the sorted interval index in bulk
+        for contract in sorted(contracts, key=lambda x: x.contract_number):
+            session_contract: Contract = Contract(
+                contract_number=self.next_contract_number,
+                contract_name=contract.contract_name,
+                start_hour=contract.duration_range[0],
+                duration=contract.duration_range[1] - contract.duration_range[0],
+                price=contract.penalty,
+            )
+            self.next_contract_number += 1
+            if session_contract.contract_name in self.contracts_by_name:
+                raise SessionUpdateError(DUPLICATE_NAMES_MESSAGE)
+            self.contracts_by_name[session_contract.contract_name] = session_contract
+            self.positive_prices += 1 if session_contract.penalty > 0 else 0
+        if self.positive_prices == 0:
+            raise SessionUpdateError(ZERO_PRICES_MESSAGE)
+
+        self.sorted_contracts = sorted(
+            self.contracts_by_name.values(),
+            key=lambda x: (x.duration_range[1], x.contract_number),
+        )
+        self.sort_keys = [
+            (i.duration_range[1], i.contract_number) for i in self.sorted_contracts
+        ]
+        self.end_hours = [i.duration_range[1] for i in self.sorted_contracts]
+        self.predecessors = [0] * len(self.sorted_contracts)
+        self.taken = [False] * len(self.sorted_contracts)
+        self.best_weights = [0] * (len(self.sorted_contracts) + 1)
+        self._refresh(0)
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.sorted_contracts)
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # The lock cannot be pickled, every copy of the session gets its own
+        state: typing.Dict[str, typing.Any] = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        return None
+
+    def update(
+        self,
+        add: typing.Iterable[typing.Tuple[str, int, int, int]] = (),
+        remove: typing.Iterable[str] = (),
+        reprice: typing.Iterable[typing.Tuple[str, int]] = (),
+    ) -> None:
+        """
+        Removes contracts (by name), reprices contracts (by name) and adds contracts given as (name, start, duration,
+        price), then refreshes the affected table entries. Removals are applied first, so a contract can be replaced by
+        removing and adding the same name. Raises SessionUpdateError without changing the session if the update is
+        invalid.
+        """
+        add = list(add)
+        remove = list(remove)
+        reprice = list(reprice)
+
+        with self.lock:
+            self._check_update(add, remove, reprice)
+
+            first_position: int = len(self.sorted_contracts)
+            for name in remove:
+                first_position = min(first_position, self._remove(name))
+            for name, price in reprice:
+                contract: Contract = self.contracts_by_name[name]
+                first_position = min(first_position, self._remove(name))
+                first_position = min(
+                    first_position,
+                    self._insert(
+                        name,
+                        contract.duration_range[0],
+                        contract.duration_range[1],
+                        price,
+                    ),
+                )
+            for name, start, duration, price in add:
+                first_position = min(
+                    first_position, self._insert(name, start, start + duration, price)
+                )
+
+            self._refresh(first_position)
+
+        return None
+
+    def get_path(self) -> typing.List[Contract]:
+        """
+        Returns the contracts of the optimal schedule, sorted by start hour.
+        """
+        with self.lock:
+            path: typing.List[Contract] = list()
+            k: int = len(self.sorted_contracts)
+            while k > 0:
+                if self.taken[k - 1]:
+                    path.append(self.sorted_contracts[k - 1])
+                    k = self.predecessors[k - 1]
+                else:
+                    k -= 1
+        path.reverse()  # Non overlapping contracts sorted by end hour are also sorted by start hour
+        return path
+
+    def get_income(self) -> int:
+        return sum(i.penalty for i in self.get_path())
+
+    @property
+    def state(self) -> State:
+        path: typing.List[Contract] = sorted(
+            self.get_path(), key=lambda x: x.contract_number
+        )
+        return State.from_contracts(path, list(self.contracts_by_name.values()))
+
+    def _check_update(
+        self,
+        add: typing.List[typing.Tuple[str, int, int, int]],
+        remove: typing.List[str],
+        reprice: typing.List[typing.Tuple[str, int]],
+    ) -> None:
+        # Checking the names
+        removed_names: typing.Set[str] = set(remove)
+        if len(removed_names) < len(remove):
+            raise SessionUpdateError("Contracts can only be removed once per update.")
+        for name in remove:
+            if name not in self.contracts_by_name:
+                raise SessionUpdateError(f"Unknown contract '{name}'.")
+
+        repriced_names: typing.Set[str] = set(i[0] for i in reprice)
+        if len(repriced_names) < len(reprice):
+            raise SessionUpdateError("Contracts can only be repriced once per update.")
+        for name in repriced_names:
+            if name not in self.contracts_by_name or name in removed_names:
+                raise SessionUpdateError(f"Unknown contract '{name}'.")
+
+        added_names: typing.Set[str] = set(i[0] for i in add)
+        if len(added_names) < len(add):
+            raise SessionUpdateError(DUPLICATE_NAMES_MESSAGE)
+        for name in added_names:
+            if name in self.contracts_by_name and name not in removed_names:
+                raise SessionUpdateError(DUPLICATE_NAMES_MESSAGE)
+
+        # Checking that at least one contract still has a price of > 0
+        positive_prices: int = self.positive_prices
+        positive_prices -= sum(
+            1 for i in remove if self.contracts_by_name[i].penalty > 0
+        )
+        positive_prices -= sum(
+            1 for i, _ in reprice if self.contracts_by_name[i].penalty > 0
+        )
+        positive_prices += sum(1 for _, price in reprice if price > 0)
+        positive_prices += sum(1 for *_, price in add if price > 0)
+        if positive_prices == 0:
+            raise SessionUpdateError(ZERO_PRICES_MESSAGE)
+
+        return None
+
+    def _insert(self, name: str, start_hour: int, end_hour: int, price: int) -> int:
+        # Creating the contract, numbers are increasing so that ties are resolved in favour of the older contracts
+        contract: Contract = Contract(
+            contract_number=self.next_contract_number,
+            contract_name=name,
+            start_hour=start_hour,
+            duration=end_hour - start_hour,
+            price=price,
+        )
+        self.next_contract_number += 1
+        self.contracts_by_name[name] = contract
+        self.positive_prices += 1 if price > 0 else 0
+
+        # Placing the contract at its sorted position, its table entries are filled in by the next refresh
+        sort_key: SortKey = (end_hour, contract.contract_number)
+        position: int = bisect.bisect_left(self.sort_keys, sort_key)
+        self.sort_keys.insert(position, sort_key)
+        self.sorted_contracts.insert(position, contract)
+        self.end_hours.insert(position, end_hour)
+        self.predecessors.insert(position, 0)
+        self.taken.insert(position, False)
+        self.best_weights.insert(position + 1, 0)
+
+        return position
+
+    def _remove(self, name: str) -> int:
+        contract: Contract = self.contracts_by_name.pop(name)
+        self.positive_prices -= 1 if contract.penalty > 0 else 0
+
+        position: int = bisect.bisect_left(
+            self.sort_keys, (contract.duration_range[1], contract.contract_number)
+        )
+        del self.sort_keys[position]
+        del self.sorted_contracts[position]
+        del self.end_hours[position]
+        del self.predecessors[position]
+        del self.taken[position]
+        del self.best_weights[position + 1]
+
+        return position
+
+    def _refresh(self, first_position: int) -> None:
+        """
+        Recomputes the predecessors and the table entries of every sorted position from first_position onwards.
+        """
+        for k in range(first_position, len(self.sorted_contracts)):
+            contract: Contract = self.sorted_contracts[k]
+
+            ## Number of contracts that end before (or exactly when) the current contract starts
+            predecessor: int = bisect.bisect_right(
+                self.end_hours, contract.duration_range[0], 0, k
+            )
+            self.predecessors[k] = predecessor
+
+            taken_weight: int = (
+                self.best_weights[predecessor]
+                + contract.penalty * self.weight_scale
+                - 1
+            )
+            if taken_weight > self.best_weights[k]:
+                self.best_weights[k + 1] = taken_weight
+                self.taken[k] = True
+            else:
+                self.best_weights[k + 1] = self.best_weights[k]
+                self.taken[k] = False
+
+        self.last_refreshed_entries = max(
+            len(self.sorted_contracts) - first_position, 0
+        )
+        return None
+
+
+class SessionStore:
+    """
+    Schedule sessions kept within the memory of the current process. The least recently used sessions are dropped once
+    the number of sessions exceeds the maximum.
+    """
+
+    def __init__(self, max_sessions: int) -> None:
+        self.max_sessions: int = max_sessions
+
+        # Sessions ordered from the least to the most recently used
+        self._sessions: collections.OrderedDict[
+            str, ScheduleSession
+        ] = collections.OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        return None
+
+    def put(self, session_id: str, session: ScheduleSession) -> None:
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return None
+
+    def get(self, session_id: str) -> typing.Optional[ScheduleSession]:
+        with self._lock:
+            session: typing.Optional[ScheduleSession] = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+        return session
+
+    def update(
+        self, session_id: str, **changes: typing.Any
+    ) -> typing.Optional[ScheduleSession]:
+        """
+        Applies the changes (see ScheduleSession.update) to a session and returns it, or None if the session is unknown.
+        """
+        session: typing.Optional[ScheduleSession] = self.get(session_id)
+        if session is not None:
+            session.update(**changes)
+        return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        return None
+
+
+class SqliteSessionStore:
+    """
+    Schedule sessions pickled into a SQLite database file, so that every worker process of the webserver can update the
+    sessions created by the others. Updates load, change and store a session within a single write transaction, so
+    concurrent updates of a session are applied one after the other. The least recently used sessions are dropped once
+    the number of sessions exceeds the maximum.
+    """
+
+    def __init__(self, path: str, max_sessions: int) -> None:
+        self.path: str = path
+        self.max_sessions: int = max_sessions
+
+        # Opened on first use by every worker process, like the connection of the SqliteCacheBackend
+        self._connection: typing.Optional[sqlite3.Connection] = None
+        self._connection_pid: typing.Optional[int] = None
+        self._lock: threading.Lock = threading.Lock()
+        return None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None or self._connection_pid != os.getpid():
+            import sqlite3  # Imported on demand, since the store is only used when a session path is configured
+
+            self._connection = sqlite3.connect(
+                self.path, timeout=5, check_same_thread=False, isolation_level=None
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, session BLOB, accessed REAL)"
+            )
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def put(self, session_id: str, session: ScheduleSession) -> None:
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (session_id, pickle.dumps(session), time.time()),
+            )
+
+            # Evicting the least recently used sessions
+            self.connection.execute(
+                "DELETE FROM sessions WHERE session_id NOT IN (SELECT session_id FROM sessions ORDER BY accessed DESC LIMIT ?)",
+                (self.max_sessions,),
+            )
+        return None
+
+    def get(self, session_id: str) -> typing.Optional[ScheduleSession]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT session FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE sessions SET accessed = ? WHERE session_id = ?",
+                (time.time(), session_id),
+            )
+        return pickle.loads(row[0])
+
+    def update(
+        self, session_id: str, **changes: typing.Any
+    ) -> typing.Optional[ScheduleSession]:
+        """
+        Applies the changes (see ScheduleSession.update) to a session and returns it, or None if the session is unknown.
+        The stored session is left unchanged if the update raises.
+        """
+        with self._lock:
+            # Taking the write lock of the database before reading, so that no other worker updates the session meanwhile
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    "SELECT session FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                if row is None:
+                    self.connection.execute("ROLLBACK")
+                    return None
+                session: ScheduleSession = pickle.loads(row[0])
+                session.update(**changes)
+                self.connection.execute(
+                    "UPDATE sessions SET session = ?, accessed = ? WHERE session_id = ?",
+                    (pickle.dumps(session), time.time(), session_id),
+                )
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self.connection.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+        return None
@@ -0,0 +1,401 @@
+from __future__ import annotations
+import typing
+import itertools
+import json
+import operator
+import pydantic
+from lib.classes import (
+    ContractTable,
+    FailureResponse,
+    IntegerColumn,
+    NamePool,
+    PayloadBody,
+    ShipSchedule,
+    SolveResult,
+    SuccessfulResponse,
+    DEFAULT_SOLVER,
+    EMPTY_NAME_MESSAGE,
+    NEGATIVE_VALUE_MESSAGE,
+    NON_POSITIVE_DURATION_MESSAGE,
+    VALUE_TOO_LARGE_MESSAGE,
+    DUPLICATE_NAMES_MESSAGE,
+    ZERO_PRICES_MESSAGE,
+    VALUE_THRESHOLD,
+    MAX_TOP_K,
+)
+
+
+NOT_A_DICTIONARY_MESSAGE: str = "Input should be a valid dictionary"
+
+
+class RecordError(ValueError):
+    """
+    Raised when a contract record (or the set of records) fails the same checks as the PayloadBody validators.
+    """
+
+    def __init__(self, message: str, line_number: typing.Optional[int] = None) -> None:
+        self.line_number: typing.Optional[int] = line_number
+        super().__init__(
+            message if line_number is None else f"Line {line_number}: {message}"
+        )
+        return None
+
+
+class ContractColumns(ContractTable):
+    """
+    ContractTable that is filled in one record at a time, where the position of a record is its contract number. The
+    durations are also kept as received, since they are sent to the solver processes (see solve_contract_columns) and
+    returned within the responses.
+
+    Records are checked as they are appended, with the same rules (and messages) as the PayloadContract and PayloadBody
+    validators, so that a payload can be validated in a single pass without creating an object per contract. The names
+    are pooled once every record was appended (see validate).
+    """
+
+    def __init__(self) -> None:
+        super().__init__(
+            start_hours=IntegerColumn(),
+            end_hours=IntegerColumn(),
+            prices=IntegerColumn(),
+            contract_numbers=IntegerColumn(),
+        )
+        self.durations: IntegerColumn = IntegerColumn()
+
+        # Names of the appended records, only kept until validate pools them
+        self._appended_names: typing.List[str] = []
+        self._unique_names: typing.Set[str] = set()
+        self._has_non_zero_price: bool = False
+        return None
+
+    @classmethod
+    def from_values(
+        cls,
+        names: typing.List[str],
+        start_hours: typing.List[int],
+        durations: typing.List[int],
+        prices: typing.List[int],
+    ) -> ContractColumns:
+        """
+        Creates the columns from lists of values that were already validated, including the uniqueness of the names.
+        """
+        columns: ContractColumns = cls()
+        columns.start_hours = IntegerColumn.from_values(start_hours)
+        columns.end_hours = IntegerColumn.from_values(
+            list(map(operator.add, start_hours, durations))
+        )
+        columns.prices = IntegerColumn.from_values(prices)
+        columns.contract_numbers = IntegerColumn.from_values(list(range(len(names))))
+        columns.names = NamePool(names)
+        columns.durations = IntegerColumn.from_values(durations)
+        columns._has_non_zero_price = any(prices)
+        return columns
+
+    def append(
+        self,
+        name: typing.Any,
+        start: typing.Any,
+        duration: typing.Any,
+        price: typing.Any,
+        line_number: typing.Optional[int] = None,
+    ) -> None:
+        # Checking the field types, bool is rejected even though it is a subclass of int
+        if not isinstance(name, str):
+            raise RecordError("'name' field must be a string.", line_number)
+        for field_name, value in (
+            ("start", start),
+            ("duration", duration),
+            ("price", price),
+        ):
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise RecordError(
+                    f"'{field_name}' field must be an integer.", line_number
+                )
+
+        # Checking the field values
+        if len(name) == 0:
+            raise RecordError(EMPTY_NAME_MESSAGE, line_number)
+        if start < 0 or price < 0:
+            raise RecordError(NEGATIVE_VALUE_MESSAGE, line_number)
+        if duration <= 0:
+            raise RecordError(NON_POSITIVE_DURATION_MESSAGE, line_number)
+        if (
+            start >= VALUE_THRESHOLD
+            or duration >= VALUE_THRESHOLD
+            or price >= VALUE_THRESHOLD
+        ):
+            raise RecordError(VALUE_TOO_LARGE_MESSAGE, line_number)
+        if name in self._unique_names:
+            raise RecordError(DUPLICATE_NAMES_MESSAGE, line_number)
+
+        # Adding the record to the columns
+        self._unique_names.add(name)
+        self._has_non_zero_price = self._has_non_zero_price or price > 0
+        self._appended_names.append(name)
+        self.contract_numbers.append(len(self.start_hours))
+        self.start_hours.append(start)
+        self.end_hours.append(start + duration)
+        self.durations.append(duration)
+        self.prices.append(price)
+
+        return None
+
+    def validate(self) -> None:
+        """
+        Performs the checks that can only be done once every record has been appended, then pools the names. The list
+        and the set of the appended names are released, so that only the pool is kept for the rest of the request.
+        """
+        if not self._has_non_zero_price:
+            raise RecordError(ZERO_PRICES_MESSAGE)
+        self.names = NamePool(self._appended_names)
+        self._appended_names = []
+        self._unique_names = set()
+        return None
+
+    def append_ndjson_line(
+        self, line: typing.Union[bytes, str], line_number: int
+    ) -> None:
+        """
+        Parses a single line of newline delimited JSON, holding one contract record. Blank lines are skipped.
+        """
+        if len(line.strip()) == 0:
+            return None
+        try:
+            record: typing.Any = json.loads(line)
+        except ValueError:
+            raise RecordError("Invalid JSON record.", line_number)
+        if not isinstance(record, dict):
+            raise RecordError("Every line must hold a JSON object.", line_number)
+        try:
+            self.append(
+                record["name"],
+                record["start"],
+                record["duration"],
+                record["price"],
+                line_number,
+            )
+        except KeyError as error:
+            raise RecordError(f"Missing field {error}.", line_number)
+        return None
+
+
+async def read_ndjson_contracts(
+    chunks: typing.AsyncIterator[bytes],
+) -> ContractColumns:
+    """
+    Incrementally parses a stream of newline delimited contract records into columns. Only a single partial line is
+    buffered at any time.
+    """
+    columns: ContractColumns = ContractColumns()
+    pending: bytes = b""
+    line_number: int = 0
+
+    async for chunk in chunks:
+        pending += chunk
+        lines: typing.List[bytes] = pending.split(b"\n")
+        pending = lines.pop()  # The last element is an incomplete line (or empty)
+        for line in lines:
+            line_number += 1
+            columns.append_ndjson_line(line, line_number)
+
+    # Processing the last line, which may not end with a newline
+    if len(pending) > 0:
+        line_number += 1
+        columns.append_ndjson_line(pending, line_number)
+
+    columns.validate()
+    return columns
+
+
+class PayloadColumns(typing.NamedTuple):
+    """
+    Contents of a validated PayloadBody, with the contracts stored as columns.
+    """
+
+    columns: ContractColumns
+    time_budget_ms: typing.Optional[float] = None
+    max_states: typing.Optional[int] = None
+    ships: int = 1
+    top_k: int = 1
+
+    @classmethod
+    def from_payload_body(cls, payload_body: PayloadBody) -> PayloadColumns:
+        payload_contracts = payload_body.contracts_list
+        return cls(
+            columns=ContractColumns.from_values(
+                [i.name for i in payload_contracts],
+                [i.start for i in payload_contracts],
+                [i.duration for i in payload_contracts],
+                [i.price for i in payload_contracts],
+            ),
+            time_budget_ms=payload_body.time_budget_ms,
+            max_states=payload_body.max_states,
+            ships=payload_body.ships,
+            top_k=payload_body.top_k,
+        )
+
+
+def decode_payload(payload: typing.Any) -> typing.Optional[PayloadColumns]:
+    """
+    Validates a parsed JSON payload against the rules of the PayloadBody (and PayloadContract) validators using bulk
+    passes over whole columns, instead of validating every contract separately.
+
+    Only payloads that the PayloadBody model accepts without converting any value are decoded. None is returned for
+    everything else (invalid payloads, but also values that the model would convert, such as numeric strings), so that
+    the caller can fall back to the PayloadBody model, which then produces the exact same result or errors.
+    """
+    if type(payload) is not dict or type(payload.get("contracts_list")) is not list:
+        return None
+    records: typing.List[typing.Any] = payload["contracts_list"]
+    if len(records) == 0:
+        return None
+
+    # Checking the budgets, which the model converts to a float and an int
+    time_budget_ms: typing.Any = payload.get("time_budget_ms")
+    if time_budget_ms is not None:
+        if type(time_budget_ms) is int and time_budget_ms < 2**53:
+            time_budget_ms = float(time_budget_ms)
+        if type(time_budget_ms) is not float or not time_budget_ms > 0:
+            return None
+    max_states: typing.Any = payload.get("max_states")
+    if max_states is not None and (type(max_states) is not int or max_states <= 0):
+        return None
+    ships: typing.Any = payload.get("ships", 1)
+    if type(ships) is not int or ships <= 0:
+        return None
+    top_k: typing.Any = payload.get("top_k", 1)
+    if type(top_k) is not int or not 0 < top_k <= MAX_TOP_K:
+        return None
+    if ships > 1 and top_k > 1:
+        return None
+    if (ships > 1 or top_k > 1) and (
+        time_budget_ms is not None or max_states is not None
+    ):
+        return None
+
+    # Splitting the records into columns
+    try:
+        names: typing.List[typing.Any] = [i["name"] for i in records]
+        start_hours: typing.List[typing.Any] = [i["start"] for i in records]
+        durations: typing.List[typing.Any] = [i["duration"] for i in records]
+        prices: typing.List[typing.Any] = [i["price"] for i in records]
+    except (KeyError, TypeError):
+        return None  # Missing fields, or records that are not objects
+
+    # Checking the field types, bool is rejected even though it is a subclass of int
+    if set(map(type, names)) != {str}:
+        return None
+    if set(map(type, itertools.chain(start_hours, durations, prices))) != {int}:
+        return None
+
+    # Checking the field values
+    if min(map(len, names)) == 0:
+        return None
+    if min(start_hours) < 0 or min(prices) < 0 or min(durations) <= 0:
+        return None
+    if max(max(start_hours), max(durations), max(prices)) >= VALUE_THRESHOLD:
+        return None
+    if len(set(names)) < len(names) or max(prices) == 0:
+        return None
+
+    return PayloadColumns(
+        columns=ContractColumns.from_values(names, start_hours, durations, prices),
+        time_budget_ms=time_budget_ms,
+        max_states=max_states,
+        ships=ships,
+        top_k=top_k,
+    )
+
+
+def validate_batch_entry(
+    raw_payload: typing.Any,
+) -> typing.Union[PayloadColumns, FailureResponse]:
+    """
+    Validates a single payload of a batch. Invalid payloads are returned as a FailureResponse holding the location and
+    the message of every error (e.g. "contracts_list: Field required"), instead of failing the whole batch.
+    """
+    if not isinstance(raw_payload, dict):
+        return FailureResponse(reason=NOT_A_DICTIONARY_MESSAGE)
+    payload_columns: typing.Optional[PayloadColumns] = decode_payload(raw_payload)
+    if payload_columns is not None:
+        return payload_columns
+
+    # Falling back to the model, which converts the values or reports the errors
+    try:
+        return PayloadColumns.from_payload_body(PayloadBody(**raw_payload))
+    except pydantic.ValidationError as error:
+        return FailureResponse(
+            reason="; ".join(
+                f"{'.'.join(map(str, i['loc']))}: {i['msg']}"
+                if len(i["loc"]) > 0
+                else i["msg"]
+                for i in error.errors()
+            )
+        )
+
+
+def pack_payload(payload_columns: PayloadColumns) -> typing.Tuple[typing.Any, ...]:
+    """
+    Packs the payload into the arguments of solve_contract_columns, which are cheap to send to the solver processes.
+    """
+    columns: ContractColumns = payload_columns.columns
+    return (
+        columns.start_hours.values,
+        columns.durations.values,
+        columns.prices.values,
+        DEFAULT_SOLVER,
+        payload_columns.time_budget_ms,
+        payload_columns.max_states,
+        payload_columns.ships,
+        payload_columns.top_k,
+    )
+
+
+def get_schedule(
+    columns: ContractColumns, contract_numbers: typing.List[int]
+) -> typing.Dict[str, typing.Any]:
+    """
+    Returns the income and the path (the names of the contracts, in the order of their start hours) of a schedule.
+    """
+    # Getting the chosen contracts, in the order of their start hours
+    chosen_contracts: typing.List[int] = sorted(
+        contract_numbers, key=lambda x: columns.start_hours.values[x]
+    )
+
+    income: int = sum(
+        columns.prices.values[i] for i in chosen_contracts
+    )  # Note: The penalty is equivalent to the price - Essentially if the job is not taken, the price becomes the penalty.
+    path: typing.List[str] = [columns.names[i] for i in chosen_contracts]
+    return {"income": income, "path": path}
+
+
+def build_response(
+    payload_columns: PayloadColumns, solve_result: SolveResult
+) -> SuccessfulResponse:
+    columns: ContractColumns = payload_columns.columns
+
+    # Constructing the response
+    response: SuccessfulResponse = SuccessfulResponse(
+        **get_schedule(columns, solve_result.contract_numbers)
+    )
+    if (
+        payload_columns.time_budget_ms is not None
+        or payload_columns.max_states is not None
+    ):
+        response.optimality_proven = solve_result.optimality_proven
+        response.bound_gap = solve_result.bound_gap
+
+    # Adding the schedule of every ship when several ships were requested
+    if solve_result.ship_contract_numbers is not None:
+        response.ship_schedules = [
+            ShipSchedule(**get_schedule(columns, i))
+            for i in solve_result.ship_contract_numbers
+        ]
+
+    # Adding the next best schedules when top_k > 1 was requested
+    if solve_result.alternative_contract_numbers is not None:
+        response.alternatives = [
+            SuccessfulResponse(**get_schedule(columns, i))
+            for i in solve_result.alternative_contract_numbers
+        ]
+
+    return response
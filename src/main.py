@@ -1,10 +1,422 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import concurrent.futures
+import contextlib
+import json
 import logging
+import math
+import operator
+import os
+import pydantic
+import random
+import threading
+import time
 import typing
-from lib.classes import PayloadBody, Contract, SuccessfulResponse, Manager
+import uuid
+from lib.classes import (
+    Contract,
+    PayloadBody,
+    SessionBody,
+    SuccessfulResponse,
+    FailureResponse,
+    SessionResponse,
+    SessionUpdateBody,
+    IntegerColumn,
+    SolveResult,
+    SOLVER_FAILURE_MESSAGE,
+    find_components,
+    group_components,
+    merge_solve_results,
+    solve_contract_columns,
+    solve_contract_column_batch,
+    warm_up_solvers,
+)
+from lib.streaming import (
+    ContractColumns,
+    PayloadColumns,
+    RecordError,
+    build_response,
+    decode_payload,
+    pack_payload,
+    read_ndjson_contracts,
+    validate_batch_entry,
+)
+from lib.cache import ResultCache, SqliteCacheBackend, fingerprint_contracts
+from lib.sessions import (
+    ScheduleSession,
+    SessionStore,
+    SessionUpdateError,
+    SqliteSessionStore,
+)
+from lib.metrics import MetricsRegistry, RequestTrace
+from lib.profiling import ProfileSpool, profile_contract_columns
+
+# Setting up the global logging parameters, the solver engines only log their per solve details at the debug level
+logging.basicConfig(
+    format=r"%(asctime)s UTC - %(message)s",
+    level=os.environ.get("SPACESHIP_LOG_LEVEL", "INFO"),
+    datefmt=r"%d-%m-%Y %H:%M:%S",
+)
+
+# Solver configuration, can be overridden using environment variables
+WEB_CONCURRENCY: int = int(
+    os.environ.get("WEB_CONCURRENCY", 1)
+)  # Number of webserver worker processes (read by gunicorn as well), every worker starts its own solver pool.
+SOLVER_PROCESSES: int = int(
+    os.environ.get(
+        "SPACESHIP_SOLVER_PROCESSES",
+        max(1, (os.cpu_count() or 1) // max(WEB_CONCURRENCY, 1)),
+    )
+)  # Number of processes used by every worker to solve requests. 0 solves within a thread of the worker instead.
+REQUEST_TIMEOUT_SECONDS: float = float(
+    os.environ.get("SPACESHIP_REQUEST_TIMEOUT_SECONDS", 600)
+)  # Deadline of every request, a 504 response is returned once it expires.
+SPLIT_MIN_CONTRACTS: int = int(
+    os.environ.get("SPACESHIP_SPLIT_MIN_CONTRACTS", 10000)
+)  # Payloads with at least this many contracts are split into independent components, solved concurrently.
+MAX_PENDING_REQUESTS: int = int(
+    os.environ.get("SPACESHIP_MAX_PENDING_REQUESTS", 4 * max(SOLVER_PROCESSES, 1))
+)  # Number of requests that may be solving or waiting for a solver, a 503 response is returned beyond this.
+BATCH_CHUNK_SIZE: int = int(
+    os.environ.get("SPACESHIP_BATCH_CHUNK_SIZE", 16)
+)  # Largest number of payloads of a batch request that are sent to a solver process at once.
+
+CACHE_SIZE: int = int(
+    os.environ.get("SPACESHIP_CACHE_SIZE", 1024)
+)  # Number of results cached by every worker process. 0 disables the cache.
+CACHE_TTL_SECONDS: float = float(
+    os.environ.get("SPACESHIP_CACHE_TTL_SECONDS", 3600)
+)  # Time after which a cached result is evicted.
+CACHE_PATH: typing.Optional[str] = os.environ.get(
+    "SPACESHIP_CACHE_PATH"
+)  # Optional SQLite database file, used to share cached results between the worker processes.
+
+result_cache: ResultCache = ResultCache(
+    max_entries=CACHE_SIZE,
+    ttl_seconds=CACHE_TTL_SECONDS,
+    backend=(
+        SqliteCacheBackend(CACHE_PATH, CACHE_SIZE, CACHE_TTL_SECONDS)
+        if CACHE_PATH is not None and CACHE_SIZE > 0
+        else None
+    ),
+)
+
+MAX_SESSIONS: int = int(
+    os.environ.get("SPACESHIP_MAX_SESSIONS", 1024)
+)  # Number of schedule sessions kept, the least recently used ones are dropped beyond this.
+SESSION_PATH: typing.Optional[str] = os.environ.get(
+    "SPACESHIP_SESSION_PATH"
+)  # Optional SQLite database file, used to share the schedule sessions between the worker processes.
+
+WARM_UP: bool = (
+    os.environ.get("SPACESHIP_WARM_UP", "1") == "1"
+)  # Whether every worker process is warmed up before it accepts requests.
+WARM_UP_BODY: bytes = json.dumps(
+    {
+        "contracts_list": [
+            {"name": "contract1", "start": 0, "duration": 5, "price": 10},
+            {"name": "contract2", "start": 3, "duration": 7, "price": 14},
+        ]
+    }
+).encode()  # Tiny payload sent through the optimize path during the warm up
+
+METRICS_PATH: typing.Optional[str] = os.environ.get(
+    "SPACESHIP_METRICS_PATH"
+)  # Optional directory, used to aggregate the metrics of the worker processes.
+METRICS_FLUSH_SECONDS: float = float(
+    os.environ.get("SPACESHIP_METRICS_FLUSH_SECONDS", 1)
+)  # Interval at which every worker process shares its metrics within the metrics directory.
+TRACE_HEADER: str = "X-Spaceship-Trace"
+UNMATCHED_PATH_LABEL: str = (
+    "unmatched"  # Path label of the requests that matched no route
+)
+
+metrics_registry: MetricsRegistry = MetricsRegistry(
+    directory=METRICS_PATH, flush_interval_seconds=METRICS_FLUSH_SECONDS
+)
+
+PROFILE_PATH: typing.Optional[str] = os.environ.get(
+    "SPACESHIP_PROFILE_PATH"
+)  # Optional spool directory of solver profiles, profiling is disabled without it.
+PROFILE_SAMPLE_RATE: float = float(
+    os.environ.get("SPACESHIP_PROFILE_SAMPLE_RATE", 0)
+)  # Fraction of the solved requests that are profiled, on top of the requests that send the profile header.
+PROFILE_MAX_BYTES: int = int(
+    os.environ.get("SPACESHIP_PROFILE_MAX_BYTES", 100 * 2**20)
+)  # Size of the spool, the oldest profiles are removed beyond this.
+PROFILE_HEADER: str = "X-Spaceship-Profile"
+
+profile_spool: typing.Optional[ProfileSpool] = (
+    ProfileSpool(PROFILE_PATH, PROFILE_MAX_BYTES) if PROFILE_PATH is not None else None
+)
+
+# Schedule sessions, kept within the memory of every worker process unless a session path is configured
+session_store: typing.Union[SessionStore, SqliteSessionStore] = (
+    SqliteSessionStore(SESSION_PATH, MAX_SESSIONS)
+    if SESSION_PATH is not None
+    else SessionStore(MAX_SESSIONS)
+)
+
+solver_pool: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+solver_threads: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+# Number of requests whose solves are running or waiting in the solver pool. Slots are released by the pool once the
+# solves finish, so the counter is guarded by a lock.
+pending_requests: int = 0
+pending_requests_lock: threading.Lock = threading.Lock()
+
+
+def get_solver_pool() -> typing.Optional[concurrent.futures.ProcessPoolExecutor]:
+    global solver_pool
+    if SOLVER_PROCESSES > 0 and solver_pool is None:
+        solver_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=SOLVER_PROCESSES
+        )
+    return solver_pool
+
+
+def get_solver_executor() -> concurrent.futures.Executor:
+    """
+    Returns the solver pool, or a pool of threads within this process when there are no solver processes.
+    """
+    global solver_threads
+    executor: typing.Optional[concurrent.futures.Executor] = get_solver_pool()
+    if executor is not None:
+        return executor
+    if solver_threads is None:
+        solver_threads = concurrent.futures.ThreadPoolExecutor()
+    return solver_threads
+
+
+def submit_solver_tasks(
+    function: typing.Callable[..., typing.Any],
+    tasks: typing.List[typing.Tuple[typing.Any, ...]],
+    slots: int = 1,
+) -> typing.List[asyncio.Future]:
+    """
+    Submits a call of the function per task to the solver executor, and returns a future per task. The request holds
+    the given number of pending request slots until every task has finished. The slots are released by the executor
+    rather than by the caller, so a request that stopped waiting (e.g. once its deadline expired) keeps counting for as
+    long as its solves occupy the solver processes. Cancelled tasks that had not started yet release their slots at once.
+    """
+    global pending_requests
+
+    remaining_tasks: int = len(tasks)
+
+    def release_task(_: typing.Any = None) -> None:
+        global pending_requests
+        nonlocal remaining_tasks
+        with pending_requests_lock:
+            remaining_tasks -= 1
+            if remaining_tasks == 0:
+                pending_requests -= slots
+        return None
+
+    with pending_requests_lock:
+        pending_requests += slots
+    executor: concurrent.futures.Executor = get_solver_executor()
+    futures: typing.List[asyncio.Future] = list()
+    for position, task in enumerate(tasks):
+        try:
+            future: concurrent.futures.Future = executor.submit(function, *task)
+        except Exception:
+            for _ in range(position, len(tasks)):
+                release_task()  # Releasing the tasks that were never submitted
+            for i in futures:
+                i.cancel()
+            raise
+        future.add_done_callback(release_task)
+        futures.append(asyncio.wrap_future(future))
+    return futures
+
+
+def warm_up() -> float:
+    """
+    Primes the worker process before it accepts requests: runs every solver engine and the validation, solve and
+    serialization of a tiny payload, then starts the solver processes. The solver processes are forked from the primed
+    process, so they start out warm as well. Returns the time taken, in seconds.
+    """
+    start_timestamp: int = time.perf_counter_ns()
+
+    warm_up_solvers()
+    payload_columns: PayloadColumns = validate_payload_body(
+        WARM_UP_BODY, "application/json"
+    )
+    jsonable_encoder(
+        build_response(
+            payload_columns, solve_contract_columns(*pack_payload(payload_columns))
+        )
+    )
+
+    # A process pool only starts its processes once work is submitted, so every process is given an empty batch
+    pool: typing.Optional[concurrent.futures.ProcessPoolExecutor] = get_solver_pool()
+    if pool is not None:
+        list(pool.map(solve_contract_column_batch, [[]] * SOLVER_PROCESSES))
+
+    warm_up_seconds: float = (time.perf_counter_ns() - start_timestamp) / (10**9)
+    metrics_registry.observe("spaceship_warm_up_seconds", warm_up_seconds)
+    logging.info(f"Worker warmed up in {warm_up_seconds * 1000:.1f} ms.")
+    return warm_up_seconds
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warming up before the worker accepts requests, so that the first requests do not pay for it
+    if WARM_UP:
+        warm_up()
+
+    yield
+
+    # Stopping the solver processes when the webserver shuts down
+    global solver_pool
+    if solver_pool is not None:
+        solver_pool.shutdown(wait=False, cancel_futures=True)
+        solver_pool = None
+
+    # Sharing the metrics of the last requests
+    metrics_registry.close()
+
+
+class MetricsMiddleware:
+    """
+    Records every request in the metrics registry, labelled by the template of its route (e.g.
+    /spaceship/sessions/{session_id}), or by UNMATCHED_PATH_LABEL when no route matched. Requests that send the trace
+    header (with a value of 1 or true) get the breakdown of their validation, solve and serialization time back within
+    the same header.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # Sharing the trace with the endpoints through the request state
+        trace: RequestTrace = RequestTrace()
+        scope.setdefault("state", {})["trace"] = trace
+        tracing: bool = any(
+            key == TRACE_HEADER.lower().encode() and value.lower() in (b"1", b"true")
+            for key, value in scope["headers"]
+        )
+        status_code: int = 500
+
+        async def send_with_trace(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                trace.finish()
+                if tracing:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (TRACE_HEADER.lower().encode(), trace.to_header().encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            # Labelling by the route template, so that path parameters and unknown URLs never add new series
+            route = scope.get("route")
+            path: str = getattr(route, "path", UNMATCHED_PATH_LABEL)
+            metrics_registry.record_request(path, status_code, trace)
+
 
 # Creating a new webserver instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+
+def failure_response(status_code: int, reason: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content=jsonable_encoder(FailureResponse(reason=reason)),
+    )
+
+
+def overloaded_response() -> JSONResponse:
+    return failure_response(
+        503, "The server is overloaded, please retry the request later."
+    )
+
+
+def timeout_reason() -> str:
+    return f"The optimal schedule could not be calculated within {REQUEST_TIMEOUT_SECONDS} seconds."
+
+
+def timeout_response() -> JSONResponse:
+    return failure_response(504, timeout_reason())
+
+
+def split_solve_arguments(
+    solve_arguments: typing.Tuple[typing.Any, ...]
+) -> typing.Tuple[
+    typing.List[typing.List[int]], typing.List[typing.Tuple[typing.Any, ...]]
+]:
+    """
+    Splits the arguments of solve_contract_columns into groups of whole timeline components, at most one group per
+    solver process. Returns the contract numbers within every group, together with the arguments of every group.
+    """
+    start_hours, durations, prices, *options = solve_arguments
+    end_hours: typing.List[int] = list(map(operator.add, start_hours, durations))
+    groups: typing.List[typing.List[int]] = group_components(
+        find_components(start_hours, end_hours), SOLVER_PROCESSES
+    )
+    group_arguments: typing.List[typing.Tuple[typing.Any, ...]] = [
+        (
+            IntegerColumn.from_values([start_hours[i] for i in group]).values,
+            IntegerColumn.from_values([durations[i] for i in group]).values,
+            IntegerColumn.from_values([prices[i] for i in group]).values,
+            *options,
+        )
+        for group in groups
+    ]
+    return groups, group_arguments
+
+
+async def solve_components_in_pool(
+    solve_arguments: typing.Tuple[typing.Any, ...]
+) -> SolveResult:
+    """
+    Splits the contracts at the gaps of the timeline and solves the groups of components concurrently, then merges
+    their paths.
+    """
+    # Sweeping within a thread, so that the event loop keeps serving other requests
+    groups, group_arguments = await asyncio.to_thread(
+        split_solve_arguments, solve_arguments
+    )
+    if len(groups) == 1:
+        return await submit_solver_tasks(solve_contract_columns, [solve_arguments])[0]
+
+    results: typing.List[SolveResult] = await asyncio.gather(
+        *submit_solver_tasks(solve_contract_columns, group_arguments)
+    )
+    return merge_solve_results(groups, results)
+
+
+async def solve_in_pool(
+    *solve_arguments: typing.Any, splittable: bool = True, profiled: bool = False
+) -> SolveResult:
+    """
+    Runs solve_contract_columns in the solver pool. Large payloads are split into independent timeline components that
+    are solved by several solver processes at once, unless splittable is False (the top_k best schedules of the whole
+    payload cannot be merged from those of its components). Profiled solves are never split, so that the profile covers
+    the whole solve. Raises asyncio.TimeoutError once the request deadline expires.
+    """
+    if profiled:
+        solving = submit_solver_tasks(profile_contract_columns, [solve_arguments])[0]
+    elif (
+        splittable
+        and get_solver_pool() is not None
+        and SOLVER_PROCESSES > 1
+        and len(solve_arguments[0]) >= SPLIT_MIN_CONTRACTS
+    ):
+        solving = solve_components_in_pool(solve_arguments)
+    else:
+        solving = submit_solver_tasks(solve_contract_columns, [solve_arguments])[0]
+    return await asyncio.wait_for(solving, timeout=REQUEST_TIMEOUT_SECONDS)
 
 
 @app.get("/testing")
@@ -12,44 +424,509 @@ async def testing():
     return {"message": "Test is successful!"}
 
 
-@app.post("/spaceship/optimize", response_model=SuccessfulResponse)
-async def process_payload(request_payload: PayloadBody):
+def raise_missing_body() -> typing.NoReturn:
+    raise RequestValidationError(
+        [
+            {
+                "type": "missing",
+                "loc": ("body",),
+                "msg": "Field required",
+                "input": None,
+            }
+        ]
+    )
+
+
+def validate_payload_body(
+    body: bytes, content_type: typing.Optional[str]
+) -> PayloadColumns:
+    """
+    Parses and validates a request body holding a PayloadBody. Typical payloads are validated in bulk by decode_payload,
+    every other payload is validated using the PayloadBody model. Invalid payloads raise the same RequestValidationError
+    that FastAPI raises for a PayloadBody parameter, so that the 422 responses are identical.
+    """
+    # Only JSON bodies are parsed, other bodies are passed on to the model as bytes (like FastAPI does)
+    payload: typing.Any = body
+    if len(body) == 0:
+        raise_missing_body()
+    main_type, _, sub_type = (
+        (content_type or "").split(";")[0].strip().lower().partition("/")
+    )
+    if main_type == "application" and (
+        sub_type == "json" or sub_type.endswith("+json")
+    ):
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError as error:
+            raise RequestValidationError(
+                [
+                    {
+                        "type": "json_invalid",
+                        "loc": ("body", error.pos),
+                        "msg": "JSON decode error",
+                        "input": {},
+                        "ctx": {"error": error.msg},
+                    }
+                ],
+                body=error.doc,
+            )
 
-    # Creating a list of contracts
-    contracts_list: typing.List[Contract] = list()
+    # FastAPI treats a JSON null like a missing body
+    if payload is None:
+        raise_missing_body()
 
-    # All validation of the PayloadBody and the PayloadContract should be done by validation methods in the Pydantic classes
-    for i, payload_contract in enumerate(request_payload.contracts_list):
-        # Creating a new contract
-        contract = Contract(
+    # Taking the fast path
+    payload_columns: typing.Optional[PayloadColumns] = decode_payload(payload)
+    if payload_columns is not None:
+        return payload_columns
+
+    # Falling back to the model, which reports every error of the payload
+    try:
+        payload_body: PayloadBody = PayloadBody.model_validate(
+            payload, from_attributes=True
+        )
+    except pydantic.ValidationError as error:
+        raise RequestValidationError(
+            [
+                {**i, "loc": ("body", *i["loc"])}
+                for i in error.errors(include_url=False)
+            ],
+            body=payload,
+        )
+    return PayloadColumns.from_payload_body(payload_body)
+
+
+def fingerprint_payload(payload_columns: PayloadColumns) -> str:
+    """
+    Returns the cache key of the payload. Sorting and hashing every contract takes seconds for millions of contracts,
+    so the fingerprint is computed within a thread, away from the event loop.
+    """
+    columns: ContractColumns = payload_columns.columns
+    fingerprint: str = fingerprint_contracts(
+        zip(
+            columns.names,
+            columns.start_hours.values,
+            columns.durations.values,
+            columns.prices.values,
+        )
+    )
+    if payload_columns.ships > 1:
+        fingerprint = f"{fingerprint}:ships={payload_columns.ships}"
+    if payload_columns.top_k > 1:
+        fingerprint = f"{fingerprint}:top_k={payload_columns.top_k}"
+
+    # Budgeted payloads are solved by another engine, whose optimal schedule may differ on ties
+    if payload_columns.time_budget_ms is not None:
+        fingerprint = f"{fingerprint}:time_budget_ms={payload_columns.time_budget_ms}"
+    if payload_columns.max_states is not None:
+        fingerprint = f"{fingerprint}:max_states={payload_columns.max_states}"
+    return fingerprint
+
+
+def get_cached_response(
+    payload_columns: PayloadColumns, fingerprint: str
+) -> typing.Optional[SuccessfulResponse]:
+    """
+    Returns the cached response of the payload, if the same set of contracts was solved before.
+    """
+    cached_value: typing.Optional[typing.Dict[str, typing.Any]] = result_cache.get(
+        fingerprint
+    )
+    if cached_value is None:
+        return None
+
+    # Only optimal results are cached, so the budget of the request is always met
+    response: SuccessfulResponse = SuccessfulResponse(**cached_value)
+    if (
+        payload_columns.time_budget_ms is not None
+        or payload_columns.max_states is not None
+    ):
+        response.optimality_proven = True
+        response.bound_gap = 0
+
+    return response
+
+
+def cache_response(
+    fingerprint: str, response: SuccessfulResponse, solve_result: SolveResult
+) -> None:
+    # Results that ran out of budget may not be optimal, so they are not cached
+    if solve_result.optimality_proven:
+        result_cache.put(
+            fingerprint,
+            response.model_dump(
+                include={"income", "path", "ship_schedules", "alternatives"},
+                exclude_none=True,
+            ),
+        )
+    return None
+
+
+def build_profile_payload(
+    payload_columns: PayloadColumns, solve_result: SolveResult
+) -> typing.Dict[str, typing.Any]:
+    """
+    Returns the payload that was solved, together with the details of the solve, as stored next to its profile.
+    """
+    columns: ContractColumns = payload_columns.columns
+    return {
+        "solver": solve_result.solver,
+        "solve_seconds": solve_result.solve_seconds,
+        "contracts_list": [
+            {"name": name, "start": start, "duration": duration, "price": price}
+            for name, start, duration, price in zip(
+                columns.names,
+                columns.start_hours.values,
+                columns.durations.values,
+                columns.prices.values,
+            )
+        ],
+        "time_budget_ms": payload_columns.time_budget_ms,
+        "max_states": payload_columns.max_states,
+        "ships": payload_columns.ships,
+        "top_k": payload_columns.top_k,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Exposes the request and solver metrics in the Prometheus text format.
+    """
+    return metrics_registry.render()
+
+
+@app.get("/spaceship/cache")
+async def cache_statistics():
+    return result_cache.get_statistics()
+
+
+@app.post(
+    "/spaceship/optimize",
+    response_model=SuccessfulResponse,
+    response_model_exclude_none=True,
+    responses={503: {"model": FailureResponse}, 504: {"model": FailureResponse}},
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/PayloadBody"}
+                }
+            },
+            "required": True,
+        }
+    },
+)
+async def process_payload(request: Request, response: Response):
+    # All validation of the payload is done by validate_payload_body, with the same rules as the Pydantic classes
+    request_payload: PayloadColumns = validate_payload_body(
+        await request.body(), request.headers.get("content-type")
+    )
+    trace: RequestTrace = request.state.trace
+    trace.mark_validated()
+
+    # Profiling the requests that ask for it (which are never answered from the cache), and a sample of the others
+    profile_requested: bool = request.headers.get(PROFILE_HEADER, "").lower() in (
+        "1",
+        "true",
+    )
+    profiled: bool = profile_spool is not None and (
+        profile_requested or random.random() < PROFILE_SAMPLE_RATE
+    )
+
+    # Checking if the same set of contracts was solved before
+    fingerprint: str = await asyncio.to_thread(fingerprint_payload, request_payload)
+    cached_response: typing.Optional[SuccessfulResponse] = get_cached_response(
+        request_payload, fingerprint
+    )
+    if cached_response is not None and not (profiled and profile_requested):
+        return cached_response
+
+    # Shedding load when too many requests are already waiting for a solver
+    if pending_requests >= MAX_PENDING_REQUESTS:
+        logging.info("Rejecting request, the solver queue is full.")
+        return overloaded_response()
+
+    solve_arguments: typing.Tuple[typing.Any, ...] = pack_payload(request_payload)
+
+    # Solving outside of the event loop, so that other requests are still served in the meantime
+    try:
+        solve_result: SolveResult = await solve_in_pool(
+            *solve_arguments,
+            splittable=request_payload.top_k == 1,
+            profiled=profiled,
+        )
+    except asyncio.TimeoutError:
+        logging.info("Request timed out while waiting for the solver.")
+        return timeout_response()
+    trace.add_solve(solve_result)
+
+    # Storing the profile together with the payload, the name of the profile is sent back within the profile header
+    if solve_result.profile is not None:
+        profile_name: str = await asyncio.to_thread(
+            profile_spool.write,
+            fingerprint,
+            solve_result.profile,
+            build_profile_payload(request_payload, solve_result),
+        )
+        metrics_registry.increment("spaceship_profiles_total")
+        response.headers[PROFILE_HEADER] = profile_name
+
+    successful_response: SuccessfulResponse = build_response(
+        request_payload, solve_result
+    )
+    cache_response(fingerprint, successful_response, solve_result)
+
+    return successful_response
+
+
+@app.post(
+    "/spaceship/optimize/batch",
+    response_model=typing.List[typing.Union[SuccessfulResponse, FailureResponse]],
+    response_model_exclude_none=True,
+    responses={503: {"model": FailureResponse}},
+)
+async def process_batch_payload(
+    request_payloads: typing.List[typing.Any], request: Request
+):
+    """
+    Solves several independent payloads, the results are returned in the same order as the payloads. Invalid payloads
+    (including items that are not objects), payloads that could not be solved in time and payloads that made the solver
+    raise are reported using a FailureResponse entry.
+    """
+    # Shedding load when too many requests are already waiting for a solver
+    if pending_requests >= MAX_PENDING_REQUESTS:
+        logging.info("Rejecting batch request, the solver queue is full.")
+        return overloaded_response()
+
+    results: typing.List[typing.Union[SuccessfulResponse, FailureResponse]] = [
+        FailureResponse(reason=timeout_reason())
+    ] * len(request_payloads)
+
+    # Validating every payload separately, so that an invalid payload does not fail the whole batch
+    validated_positions: typing.List[int] = list()
+    validated_payloads: typing.List[PayloadColumns] = list()
+    for position, raw_payload in enumerate(request_payloads):
+        request_payload: typing.Union[
+            PayloadColumns, FailureResponse
+        ] = validate_batch_entry(raw_payload)
+        if isinstance(request_payload, FailureResponse):
+            results[position] = request_payload
+        else:
+            validated_positions.append(position)
+            validated_payloads.append(request_payload)
+
+    # Only the payloads that were not solved before are sent to the solver processes
+    validated_fingerprints: typing.List[str] = await asyncio.to_thread(
+        lambda: [fingerprint_payload(i) for i in validated_payloads]
+    )
+    valid_positions: typing.List[int] = list()
+    valid_payloads: typing.List[PayloadColumns] = list()
+    fingerprints: typing.List[str] = list()
+    for position, request_payload, fingerprint in zip(
+        validated_positions, validated_payloads, validated_fingerprints
+    ):
+        cached_response: typing.Optional[SuccessfulResponse] = get_cached_response(
+            request_payload, fingerprint
+        )
+        if cached_response is not None:
+            results[position] = cached_response
+        else:
+            valid_positions.append(position)
+            valid_payloads.append(request_payload)
+            fingerprints.append(fingerprint)
+    trace: RequestTrace = request.state.trace
+    trace.mark_validated()
+
+    if len(valid_payloads) == 0:
+        return results
+
+    # Splitting the payloads into at least one chunk per solver process, and into chunks of at most BATCH_CHUNK_SIZE
+    # payloads, interleaved to spread large and small payloads evenly. Every chunk holds a pending request slot, so a
+    # large batch sheds the load of the requests that follow it like as many separate requests would.
+    total_chunks: int = max(
+        min(len(valid_payloads), max(SOLVER_PROCESSES, 1)),
+        math.ceil(len(valid_payloads) / BATCH_CHUNK_SIZE),
+    )
+    solve_arguments: typing.List[typing.Tuple[typing.Any, ...]] = [
+        pack_payload(i) for i in valid_payloads
+    ]
+
+    chunk_futures: typing.List[asyncio.Future] = submit_solver_tasks(
+        solve_contract_column_batch,
+        [(solve_arguments[chunk::total_chunks],) for chunk in range(total_chunks)],
+        slots=total_chunks,
+    )
+    _, unfinished_futures = await asyncio.wait(
+        chunk_futures, timeout=REQUEST_TIMEOUT_SECONDS
+    )
+    for future in unfinished_futures:
+        future.cancel()
+
+    # Placing the results of the finished chunks at the positions of their payloads
+    for chunk, future in enumerate(chunk_futures):
+        if future.cancelled():
+            logging.info("Batch chunk timed out while waiting for the solver.")
+            continue
+        if future.exception() is not None:
+            logging.info(f"Batch chunk failed: {future.exception()!r}")
+            for index in range(chunk, len(valid_payloads), total_chunks):
+                results[valid_positions[index]] = FailureResponse(
+                    reason=SOLVER_FAILURE_MESSAGE
+                )
+            continue
+        for index, solve_result in zip(
+            range(chunk, len(valid_payloads), total_chunks), future.result()
+        ):
+            if solve_result is None:
+                results[valid_positions[index]] = FailureResponse(
+                    reason=SOLVER_FAILURE_MESSAGE
+                )
+                continue
+            trace.add_solve(solve_result)
+            response: SuccessfulResponse = build_response(
+                valid_payloads[index], solve_result
+            )
+            cache_response(fingerprints[index], response, solve_result)
+            results[valid_positions[index]] = response
+
+    return results
+
+
+@app.post(
+    "/spaceship/optimize/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        422: {"model": FailureResponse},
+        503: {"model": FailureResponse},
+        504: {"model": FailureResponse},
+    },
+)
+async def process_stream_payload(request: Request):
+    """
+    Solves a payload given as newline delimited JSON, with one contract record ({"name", "start", "duration", "price"})
+    per line. The records are parsed incrementally into compact columns. The chosen contracts are streamed back as one
+    JSON record per line in the order of the path, followed by a final record holding the income.
+    """
+    # Shedding load when too many requests are already waiting for a solver
+    if pending_requests >= MAX_PENDING_REQUESTS:
+        logging.info("Rejecting stream request, the solver queue is full.")
+        return overloaded_response()
+
+    # Parsing and validating the records in a single pass
+    try:
+        columns: ContractColumns = await read_ndjson_contracts(request.stream())
+    except RecordError as error:
+        return failure_response(422, str(error))
+    trace: RequestTrace = request.state.trace
+    trace.mark_validated()
+
+    # Solving outside of the event loop, so that other requests are still served in the meantime
+    try:
+        solve_result: SolveResult = await solve_in_pool(
+            columns.start_hours.values, columns.durations.values, columns.prices.values
+        )
+    except asyncio.TimeoutError:
+        logging.info("Stream request timed out while waiting for the solver.")
+        return timeout_response()
+    trace.add_solve(solve_result)
+
+    # Streaming the path back in the order of the start hours
+    chosen_numbers: typing.List[int] = sorted(
+        solve_result.contract_numbers, key=lambda x: columns.start_hours.values[x]
+    )
+
+    def generate_records() -> typing.Iterator[str]:
+        income: int = 0
+        for i in chosen_numbers:
+            income += columns.prices.values[i]
+            yield json.dumps(
+                {
+                    "name": columns.names[i],
+                    "start": columns.start_hours.values[i],
+                    "duration": columns.durations.values[i],
+                    "price": columns.prices.values[i],
+                }
+            ) + "\n"
+        yield json.dumps({"income": income}) + "\n"
+
+    return StreamingResponse(generate_records(), media_type="application/x-ndjson")
+
+
+def build_session_response(
+    session_id: str, session: ScheduleSession
+) -> SessionResponse:
+    path: typing.List[Contract] = session.get_path()
+    return SessionResponse(
+        session_id=session_id,
+        income=sum(i.penalty for i in path),
+        path=[i.contract_name for i in path],
+    )
+
+
+@app.post(
+    "/spaceship/sessions",
+    response_model=SessionResponse,
+    response_model_exclude_none=True,
+    status_code=201,
+    responses={422: {"model": FailureResponse}},
+)
+async def create_session(request_payload: SessionBody):
+    """
+    Creates a schedule session from the payload, which can then be updated incrementally using PATCH requests. Sessions
+    are kept in the memory of the worker process that created them, unless SPACESHIP_SESSION_PATH sets a database file
+    that every worker process shares.
+    """
+    contracts_list: typing.List[Contract] = [
+        Contract(
             contract_number=i,
             contract_name=payload_contract.name,
             start_hour=payload_contract.start,
             duration=payload_contract.duration,
             price=payload_contract.price,
         )
+        for i, payload_contract in enumerate(request_payload.contracts_list)
+    ]
+    session: ScheduleSession = await asyncio.to_thread(ScheduleSession, contracts_list)
 
-        # Adding the newly created contract into the list of contracts
-        contracts_list.append(contract)
+    # Storing the session, dropping the least recently used sessions beyond the limit
+    session_id: str = uuid.uuid4().hex
+    await asyncio.to_thread(session_store.put, session_id, session)
 
-    # pdbst()
+    return build_session_response(session_id, session)
 
-    # Creating the manager
-    manager = Manager(contracts=contracts_list)
 
-    # Running the manager
-    optimal_state = manager.run()
-
-    # Getting the parameters from the optimal state
-    optimal_contracts: typing.List[Contract] = [i for i in optimal_state.contracts]
-    optimal_contracts.sort(key=lambda x: x.duration_range[0])
+@app.patch(
+    "/spaceship/sessions/{session_id}",
+    response_model=SessionResponse,
+    response_model_exclude_none=True,
+    responses={404: {"model": FailureResponse}, 422: {"model": FailureResponse}},
+)
+async def update_session(session_id: str, request_payload: SessionUpdateBody):
+    """
+    Adds, removes and reprices contracts of a schedule session. Only the part of the schedule tables that is affected
+    by the changes is recomputed: the entries from the earliest changed contract (ordered by end hour) to the end of the
+    timeline, in O((n - position) log n) for a book of n contracts. A change at the start of the timeline therefore
+    costs as much as a full solve, while changes near its end are cheap.
+    """
+    try:
+        session: typing.Optional[ScheduleSession] = await asyncio.to_thread(
+            session_store.update,
+            session_id,
+            add=[(i.name, i.start, i.duration, i.price) for i in request_payload.add],
+            remove=request_payload.remove,
+            reprice=[(i.name, i.price) for i in request_payload.reprice],
+        )
+    except SessionUpdateError as error:
+        return failure_response(422, str(error))
+    if session is None:
+        return failure_response(404, f"Unknown session '{session_id}'.")
 
-    income: int = sum(
-        i.penalty for i in optimal_contracts
-    )  # Note: The penalty is equivalent to the price - Essentially if the job is not taken, the price becomes the penalty.
-    path: typing.List[str] = [i.contract_name for i in optimal_contracts]
+    return build_session_response(session_id, session)
 
-    # Constructing the response
-    response: SuccessfulResponse = SuccessfulResponse(income=income, path=path)
 
-    return response
+@app.delete("/spaceship/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    await asyncio.to_thread(session_store.delete, session_id)
+    return None
@@ -1,10 +1,95 @@
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import unittest
 import typing
 from unittest import mock
-from src.main import app
+from src.main import app, fingerprint_payload, submit_solver_tasks
+import src.main
+from lib.classes import (
+    Contract,
+    ContractTable,
+    ConflictIndex,
+    DynamicProgrammingEngine,
+    Manager,
+    NumpyEngine,
+    PayloadBody,
+    SOLVER_ENGINES,
+    SOLVER_FAILURE_MESSAGE,
+    SolverEngine,
+    State,
+    find_components,
+    group_components,
+    merge_solve_results,
+    reduce_contracts,
+    solve_contract_column_batch,
+    solve_contract_columns,
+)
+from lib.cache import ResultCache, SqliteCacheBackend
+from lib.sessions import ScheduleSession, SessionUpdateError, SqliteSessionStore
+from lib.metrics import MetricsRegistry, RequestTrace
+from lib.profiling import ProfileSpool, read_spooled_payloads
+from lib.streaming import ContractColumns, decode_payload
+import batch
+import fuzz
 import httpx
+import argparse
+import asyncio
+import contextlib
+import itertools
 import json
+import os
+import pstats
+import random
+import tempfile
+import time
+
+
+def load_contracts(file_path: str) -> typing.List[Contract]:
+    with open(file_path) as f:
+        payload = json.load(f)
+    return [
+        Contract(
+            contract_number=i,
+            contract_name=c["name"],
+            start_hour=c["start"],
+            duration=c["duration"],
+            price=c["price"],
+        )
+        for i, c in enumerate(payload["contracts_list"])
+    ]
+
+
+def income_of(contracts: typing.Iterable[Contract]) -> int:
+    return sum(i.penalty for i in contracts)
+
+
+@contextlib.contextmanager
+def blocked_solver(function_name: str):
+    """
+    Replaces a solver entry point of the webserver with one that outlasts the request deadline, so that requests
+    deterministically time out. Solving is moved into threads, since the replacement cannot be pickled.
+    """
+
+    def blocked_function(*args):
+        time.sleep(1)
+        return None
+
+    with mock.patch(f"src.main.{function_name}", blocked_function), mock.patch(
+        "src.main.get_solver_pool", return_value=None
+    ), mock.patch("src.main.REQUEST_TIMEOUT_SECONDS", 0.05), mock.patch(
+        "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+    ):
+        yield
+
+
+def wait_for_idle_solvers(timeout_seconds: float = 5) -> None:
+    """
+    Waits until the solves of earlier requests (which may outlast their requests) have released their slots.
+    """
+    deadline: float = time.monotonic() + timeout_seconds
+    while src.main.pending_requests > 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return None
 
 
 class TestSpaceshipOptimize(unittest.TestCase):
@@ -225,9 +310,2120 @@ class TestSpaceshipOptimize(unittest.TestCase):
         actual_result = json.loads(response.content)
         self.assertEqual(expected_result, actual_result)
 
+    def test_request_timeout(self):
+        # Arrange
+        with open("examples/challenge_100.json") as f:
+            payload = json.load(f)
+
+        # Act
+        with blocked_solver("solve_contract_columns"):
+            response: httpx.Response = self.client.post(
+                "/spaceship/optimize",
+                headers={"Content-Type": "application/json"},
+                json=payload,
+            )
+
+        # Assert
+        self.assertEqual(response.status_code, 504)
+        self.assertIn("reason", json.loads(response.content))
+
+    def test_timed_out_solve_keeps_its_slot(self):
+        # Arrange
+        with open("examples/challenge_100.json") as f:
+            payload = json.load(f)
+        wait_for_idle_solvers()
+
+        # Act
+        with blocked_solver("solve_contract_columns"), mock.patch(
+            "src.main.MAX_PENDING_REQUESTS", 1
+        ):
+            timed_out_response: httpx.Response = self.client.post(
+                "/spaceship/optimize", json=payload
+            )
+            busy_pending_requests = src.main.pending_requests
+            overloaded_response: httpx.Response = self.client.post(
+                "/spaceship/optimize", json=payload
+            )
+        wait_for_idle_solvers()
+
+        # Assert
+        self.assertEqual(timed_out_response.status_code, 504)
+        self.assertEqual(busy_pending_requests, 1)
+        self.assertEqual(overloaded_response.status_code, 503)
+        self.assertEqual(src.main.pending_requests, 0)
+
+    def test_budget_fields_in_response(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+        payload["time_budget_ms"] = 1000
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize",
+            headers={"Content-Type": "application/json"},
+            json=payload,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        expected_result = {
+            "income": 18,
+            "path": ["contract1", "contract3"],
+            "optimality_proven": True,
+            "bound_gap": 0,
+        }
+        self.assertEqual(expected_result, json.loads(response.content))
+
+    def test_budget_is_searched_by_an_anytime_engine(self):
+        # Arrange
+        with open("examples/challenge_100.json") as f:
+            payload = json.load(f)
+        payload["max_states"] = 10
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize",
+            headers={"Content-Type": "application/json", "X-Spaceship-Trace": "1"},
+            json=payload,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(json.loads(response.content)["optimality_proven"])
+        self.assertGreater(json.loads(response.content)["bound_gap"], 0)
+        self.assertEqual(
+            json.loads(response.headers["X-Spaceship-Trace"])["solvers"],
+            {"best_first": 1},
+        )
+
+    def test_budget_is_rejected_for_fleets_and_top_k(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+        payloads = [
+            dict(payload, time_budget_ms=1000, ships=2),
+            dict(payload, max_states=10, top_k=2),
+        ]
+
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                # Act
+                response: httpx.Response = self.client.post(
+                    "/spaceship/optimize",
+                    headers={"Content-Type": "application/json"},
+                    json=payload,
+                )
+
+                # Assert
+                self.assertEqual(response.status_code, 422)
+
+    def test_ships_in_response(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+        payload["ships"] = 2
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize",
+            headers={"Content-Type": "application/json"},
+            json=payload,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        expected_result = {
+            "income": 32,
+            "path": ["contract1", "contract2", "contract3"],
+            "ship_schedules": [
+                {"income": 18, "path": ["contract1", "contract3"]},
+                {"income": 14, "path": ["contract2"]},
+            ],
+        }
+        self.assertEqual(expected_result, json.loads(response.content))
+
+    def test_reordered_payload_is_cached(self):
+        # Arrange
+        with open("examples/challenge_50.json") as f:
+            payload = json.load(f)
+        reordered_payload = {"contracts_list": payload["contracts_list"][::-1]}
+
+        # Act
+        with mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=8, ttl_seconds=60)
+        ):
+            first_response: httpx.Response = self.client.post(
+                "/spaceship/optimize",
+                headers={"Content-Type": "application/json"},
+                json=payload,
+            )
+            second_response: httpx.Response = self.client.post(
+                "/spaceship/optimize",
+                headers={"Content-Type": "application/json"},
+                json=reordered_payload,
+            )
+            statistics = json.loads(self.client.get("/spaceship/cache").content)
+
+        # Assert
+        self.assertEqual(first_response.status_code, 200)
+        self.assertEqual(second_response.status_code, 200)
+        self.assertEqual(
+            json.loads(first_response.content), json.loads(second_response.content)
+        )
+        self.assertEqual(statistics, {"hits": 1, "misses": 1, "size": 1})
+
+    def test_overloaded_server(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+
+        # Act
+        with mock.patch("src.main.MAX_PENDING_REQUESTS", 0), mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+        ):
+            response: httpx.Response = self.client.post(
+                "/spaceship/optimize",
+                headers={"Content-Type": "application/json"},
+                json=payload,
+            )
+
+        # Assert
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("reason", json.loads(response.content))
+
+
+class TestSpaceshipOptimizeBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+    def test_batch_results_in_order(self):
+        # Arrange
+        payloads = [
+            {
+                "contracts_list": [
+                    {"name": "contract1", "start": 0, "duration": 5, "price": 10},
+                    {"name": "contract2", "start": 3, "duration": 7, "price": 14},
+                    {"name": "contract3", "start": 5, "duration": 9, "price": 8},
+                    {"name": "contract4", "start": 5, "duration": 9, "price": 7},
+                ]
+            },
+            {"contracts_list": []},
+            {
+                "contracts_list": [
+                    {"name": "contract1", "start": 0, "duration": 5, "price": 10},
+                ]
+            },
+        ]
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize/batch",
+            headers={"Content-Type": "application/json"},
+            json=payloads,
+        )
+
+        # Assert
+
+        ## Asserting the status code
+        self.assertEqual(response.status_code, 200)
+
+        ## Asserting the content of the response
+        actual_result = json.loads(response.content)
+        self.assertEqual(len(actual_result), 3)
+        self.assertEqual(
+            actual_result[0], {"income": 18, "path": ["contract1", "contract3"]}
+        )
+        self.assertIn("reason", actual_result[1])
+        self.assertEqual(actual_result[2], {"income": 10, "path": ["contract1"]})
+
+    def test_batch_reports_every_invalid_item(self):
+        # Arrange
+        payloads = [
+            None,
+            [1],
+            {"x": 1},
+            {
+                "contracts_list": [
+                    {"name": "contract1", "start": 0, "duration": 5, "price": 10},
+                ]
+            },
+        ]
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize/batch", json=payloads
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {"reason": "Input should be a valid dictionary"},
+                {"reason": "Input should be a valid dictionary"},
+                {"reason": "contracts_list: Field required"},
+                {"income": 10, "path": ["contract1"]},
+            ],
+        )
+
+    def test_batch_timeout(self):
+        # Arrange
+        with open("examples/challenge_100.json") as f:
+            payload = json.load(f)
+
+        # Act
+        with blocked_solver("solve_contract_column_batch"):
+            response: httpx.Response = self.client.post(
+                "/spaceship/optimize/batch",
+                headers={"Content-Type": "application/json"},
+                json=[payload],
+            )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("reason", json.loads(response.content)[0])
+
+    def test_timed_out_batch_keeps_its_slots(self):
+        # Arrange
+        with open("examples/challenge_100.json") as f:
+            payload = json.load(f)
+        wait_for_idle_solvers()
+
+        # Act
+        with blocked_solver("solve_contract_column_batch"), mock.patch(
+            "src.main.MAX_PENDING_REQUESTS", 1
+        ):
+            timed_out_response: httpx.Response = self.client.post(
+                "/spaceship/optimize/batch", json=[payload]
+            )
+            busy_pending_requests = src.main.pending_requests
+            overloaded_response: httpx.Response = self.client.post(
+                "/spaceship/optimize", json=payload
+            )
+        wait_for_idle_solvers()
+
+        # Assert
+        self.assertIn("reason", timed_out_response.json()[0])
+        self.assertEqual(busy_pending_requests, 1)
+        self.assertEqual(overloaded_response.status_code, 503)
+        self.assertEqual(src.main.pending_requests, 0)
+
+    def test_batch_holds_a_slot_per_chunk(self):
+        # Arrange
+        payloads = [
+            {
+                "contracts_list": [
+                    {"name": "contract1", "start": i, "duration": 5, "price": 10}
+                ]
+            }
+            for i in range(5)
+        ]
+        observed_pending_requests = list()
+
+        def record_pending_requests(tasks):
+            observed_pending_requests.append(src.main.pending_requests)
+            return solve_contract_column_batch(tasks)
+
+        wait_for_idle_solvers()
+
+        # Act
+        with mock.patch(
+            "src.main.solve_contract_column_batch", record_pending_requests
+        ), mock.patch("src.main.get_solver_pool", return_value=None), mock.patch(
+            "src.main.SOLVER_PROCESSES", 1
+        ), mock.patch(
+            "src.main.BATCH_CHUNK_SIZE", 2
+        ), mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+        ):
+            response: httpx.Response = self.client.post(
+                "/spaceship/optimize/batch", json=payloads
+            )
+        wait_for_idle_solvers()
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), [{"income": 10, "path": ["contract1"]}] * len(payloads)
+        )
+        self.assertEqual(observed_pending_requests, [3, 3, 3])
+        self.assertEqual(src.main.pending_requests, 0)
+
+    def test_failing_payload_keeps_the_rest_of_its_chunk(self):
+        # Arrange
+        payloads = [
+            {
+                "contracts_list": [
+                    {"name": "contract1", "start": 0, "duration": 5, "price": price}
+                ]
+            }
+            for price in [10, 13, 11]
+        ]
+
+        def failing_solver(start_hours, durations, prices, *args):
+            if 13 in prices:
+                raise RuntimeError("Unlucky price")
+            return solve_contract_columns(start_hours, durations, prices, *args)
+
+        # Act
+        with mock.patch(
+            "lib.classes.solve_contract_columns", failing_solver
+        ), mock.patch("src.main.get_solver_pool", return_value=None), mock.patch(
+            "src.main.SOLVER_PROCESSES", 1
+        ), mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+        ):
+            response: httpx.Response = self.client.post(
+                "/spaceship/optimize/batch", json=payloads
+            )
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {"income": 10, "path": ["contract1"]},
+                {"reason": SOLVER_FAILURE_MESSAGE},
+                {"income": 11, "path": ["contract1"]},
+            ],
+        )
+
+
+class TestSpaceshipOptimizeStream(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+    def test_stream_example_query(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            records = json.load(f)["contracts_list"]
+        content = "\n".join(json.dumps(i) for i in records)
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize/stream",
+            headers={"Content-Type": "application/x-ndjson"},
+            content=content,
+        )
+
+        # Assert
+
+        ## Asserting the status code
+        self.assertEqual(response.status_code, 200)
+
+        ## Asserting the content of the response
+        actual_result = [json.loads(i) for i in response.text.splitlines()]
+        expected_result = [
+            {"name": "contract1", "start": 0, "duration": 5, "price": 10},
+            {"name": "contract3", "start": 5, "duration": 9, "price": 8},
+            {"income": 18},
+        ]
+        self.assertEqual(expected_result, actual_result)
+
+    def test_stream_same_contract_names(self):
+        # Arrange
+        content = "\n".join(
+            [
+                json.dumps(
+                    {"name": "contract1", "start": 0, "duration": 5, "price": 10}
+                ),
+                json.dumps(
+                    {"name": "contract1", "start": 3, "duration": 7, "price": 14}
+                ),
+            ]
+        )
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize/stream",
+            headers={"Content-Type": "application/x-ndjson"},
+            content=content,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("Line 2", json.loads(response.content)["reason"])
+
+    def test_stream_zero_prices(self):
+        # Arrange
+        content = json.dumps(
+            {"name": "contract1", "start": 0, "duration": 5, "price": 0}
+        )
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/optimize/stream",
+            headers={"Content-Type": "application/x-ndjson"},
+            content=content,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 422)
+
+
+class TestPayloadDecoding(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+        # Reference webserver, which validates the payload using the PayloadBody model only
+        reference_app = FastAPI()
+
+        @reference_app.post("/spaceship/optimize")
+        async def reference_payload(request_payload: PayloadBody):
+            return {}
+
+        self.reference_client = TestClient(reference_app)
+
+    def test_errors_match_the_payload_model(self):
+        # Arrange
+        def contract(**fields):
+            return {
+                "name": "contract1",
+                "start": 0,
+                "duration": 5,
+                "price": 10,
+                **fields,
+            }
+
+        payloads = [
+            {"contracts_list": [contract(name="")]},
+            {"contracts_list": [contract(start=-1)]},
+            {"contracts_list": [contract(duration=0)]},
+            {"contracts_list": [contract(price=2**128)]},
+            {"contracts_list": [contract(), contract()]},
+            {"contracts_list": [contract(price=0)]},
+            {"contracts_list": []},
+            {"contracts_list": [contract(start="five")]},
+            {"contracts_list": [contract(name=5)]},
+            {"contracts_list": [{"name": "contract1"}]},
+            {"contracts_list": [5]},
+            {"contracts_list": [contract()], "time_budget_ms": 0},
+            {"contracts_list": [contract()], "max_states": -1},
+            {"contracts_list": [contract()], "ships": 0},
+            {"contracts_list": [contract()], "ships": None},
+            {"contracts_list": [contract()], "top_k": 0},
+            {"contracts_list": [contract()], "top_k": 101},
+            {"contracts_list": [contract()], "ships": 2, "top_k": 2},
+            {"contracts_list": [contract()], "max_states": 10, "ships": 2},
+            {"contracts_list": [contract(start=-1, duration=-1, name="")]},
+            {},
+            [],
+        ]
+        bodies = [
+            (b"", "application/json"),
+            (b"{invalid", "application/json"),
+            (b"null", "application/json"),
+            (b'{"contracts_list": []}', "text/plain"),
+            (b'{"contracts_list": []}', None),
+        ]
+
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                # Act
+                response: httpx.Response = self.client.post(
+                    "/spaceship/optimize", json=payload
+                )
+                reference_response: httpx.Response = self.reference_client.post(
+                    "/spaceship/optimize", json=payload
+                )
+
+                # Assert
+                self.assertEqual(response.status_code, 422)
+                self.assertEqual(response.json(), reference_response.json())
+
+        for body, content_type in bodies:
+            with self.subTest(body=body, content_type=content_type):
+                # Act
+                headers = {} if content_type is None else {"Content-Type": content_type}
+                response = self.client.post(
+                    "/spaceship/optimize", content=body, headers=headers
+                )
+                reference_response = self.reference_client.post(
+                    "/spaceship/optimize", content=body, headers=headers
+                )
+
+                # Assert
+                self.assertEqual(response.status_code, 422)
+                self.assertEqual(response.json(), reference_response.json())
+
+    def test_converted_values_fall_back_to_the_payload_model(self):
+        # Arrange
+        payload = {
+            "contracts_list": [
+                {"name": "contract1", "start": "0", "duration": 5.0, "price": 10}
+            ],
+            "max_states": 10,
+        }
+
+        # Act
+        response: httpx.Response = self.client.post("/spaceship/optimize", json=payload)
+
+        # Assert
+        self.assertIsNone(decode_payload(payload))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["path"], ["contract1"])
+
+    def test_decoded_columns(self):
+        # Arrange
+        payload = {
+            "contracts_list": [
+                {"name": "contract1", "start": 0, "duration": 5, "price": 2**100},
+                {"name": "contract2", "start": 3, "duration": 7, "price": 0},
+            ],
+            "time_budget_ms": 100,
+        }
+
+        # Act
+        payload_columns = decode_payload(payload)
+
+        # Assert
+        self.assertEqual(
+            list(payload_columns.columns.names), ["contract1", "contract2"]
+        )
+        self.assertEqual(list(payload_columns.columns.start_hours.values), [0, 3])
+        self.assertEqual(payload_columns.columns.prices.values, [2**100, 0])
+        self.assertEqual(payload_columns.time_budget_ms, 100.0)
+        self.assertIsInstance(payload_columns.time_budget_ms, float)
+        self.assertIsNone(payload_columns.max_states)
+
+    def test_streamed_columns_are_a_contract_table(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            records = json.load(f)["contracts_list"]
+        columns = ContractColumns()
+
+        # Act
+        for line_number, record in enumerate(records, start=1):
+            columns.append_ndjson_line(json.dumps(record), line_number)
+        columns.validate()
+        state = Manager(columns).run()
+
+        # Assert
+        self.assertIsInstance(columns, ContractTable)
+        self.assertEqual(
+            (columns._appended_names, columns._unique_names), ([], set())
+        )  # Only the name pool is kept once the records are validated
+        self.assertEqual(
+            [i.contract_name for i in columns], [i["name"] for i in records]
+        )
+        self.assertEqual(
+            list(columns.end_hours.values),
+            [i["start"] + i["duration"] for i in records],
+        )
+        self.assertEqual(
+            [i.contract_name for i in state.contracts], ["contract1", "contract3"]
+        )
+
+
+class TestScheduleSessions(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+    def test_session_updates(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+
+        # Act
+        create_response: httpx.Response = self.client.post(
+            "/spaceship/sessions",
+            headers={"Content-Type": "application/json"},
+            json=payload,
+        )
+        session_id = json.loads(create_response.content)["session_id"]
+        update_response: httpx.Response = self.client.patch(
+            f"/spaceship/sessions/{session_id}",
+            headers={"Content-Type": "application/json"},
+            json={
+                "add": [{"name": "contract5", "start": 14, "duration": 2, "price": 3}],
+                "remove": ["contract3"],
+                "reprice": [{"name": "contract2", "price": 20}],
+            },
+        )
+        delete_response: httpx.Response = self.client.delete(
+            f"/spaceship/sessions/{session_id}"
+        )
+        missing_response: httpx.Response = self.client.patch(
+            f"/spaceship/sessions/{session_id}",
+            headers={"Content-Type": "application/json"},
+            json={"remove": ["contract1"]},
+        )
+
+        # Assert
+        self.assertEqual(create_response.status_code, 201)
+        self.assertEqual(
+            json.loads(create_response.content),
+            {
+                "session_id": session_id,
+                "income": 18,
+                "path": ["contract1", "contract3"],
+            },
+        )
+        self.assertEqual(update_response.status_code, 200)
+        self.assertEqual(
+            json.loads(update_response.content),
+            {
+                "session_id": session_id,
+                "income": 23,
+                "path": ["contract2", "contract5"],
+            },
+        )
+        self.assertEqual(delete_response.status_code, 204)
+        self.assertEqual(missing_response.status_code, 404)
+
+    def test_update_only_refreshes_affected_entries(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+        session = ScheduleSession(contracts)
+        latest_end_hour = max(i.duration_range[1] for i in contracts)
+
+        # Act
+        session.update(add=[("late_contract", latest_end_hour, 5, 50)])
+
+        # Assert
+        self.assertEqual(session.last_refreshed_entries, 1)
+        self.assertEqual(
+            session.get_income(),
+            income_of(Manager(contracts).run().contracts) + 50,
+        )
+
+    def test_update_at_the_head_refreshes_every_entry(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+        session = ScheduleSession(contracts)
+        earliest_contract = min(contracts, key=lambda x: x.duration_range[1])
+        remaining_contracts = [i for i in contracts if i is not earliest_contract]
+
+        # Act
+        session.update(remove=[earliest_contract.contract_name])
+
+        # Assert
+        self.assertEqual(session.last_refreshed_entries, len(remaining_contracts))
+        self.assertEqual(
+            session.get_income(),
+            income_of(Manager(remaining_contracts).run().contracts),
+        )
+
+    def test_invalid_update_leaves_session_unchanged(self):
+        # Arrange
+        session = ScheduleSession(load_contracts("examples/sample_request.json"))
+
+        # Act & Assert
+        with self.assertRaises(SessionUpdateError):
+            session.update(
+                remove=["contract1", "contract2"],
+                reprice=[("contract3", 0), ("contract4", 0)],
+            )
+        self.assertEqual(
+            [i.contract_name for i in session.get_path()], ["contract1", "contract3"]
+        )
+
+    def test_session_rejects_fields_it_cannot_honour(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+        payload["ships"] = 2
+
+        # Act
+        response: httpx.Response = self.client.post(
+            "/spaceship/sessions",
+            headers={"Content-Type": "application/json"},
+            json=payload,
+        )
+
+        # Assert
+        self.assertEqual(response.status_code, 422)
+
+    def test_sqlite_store_is_shared(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sessions.sqlite")
+            first_store = SqliteSessionStore(path, 2)
+            second_store = SqliteSessionStore(path, 2)
+            first_store.put(
+                "session",
+                ScheduleSession(load_contracts("examples/sample_request.json")),
+            )
+
+            # Act
+            updated_session = second_store.update(
+                "session", add=[("contract5", 14, 2, 3)], remove=["contract3"]
+            )
+            with self.assertRaises(SessionUpdateError):
+                second_store.update("session", remove=["contract3"])
+            stored_session = first_store.get("session")
+            first_store.delete("session")
+
+            # Assert
+            self.assertEqual(updated_session.get_income(), 20)
+            self.assertEqual(
+                [i.contract_name for i in stored_session.get_path()],
+                [i.contract_name for i in updated_session.get_path()],
+            )
+            self.assertIsNone(second_store.update("session", remove=["contract1"]))
+
+
+class TestResultCache(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        # Arrange
+        cache = ResultCache(max_entries=2, ttl_seconds=60)
+        cache.put("first", 1)
+        cache.put("second", 2)
+
+        # Act
+        cache.get("first")
+        cache.put("third", 3)
+
+        # Assert
+        self.assertEqual(cache.get("first"), 1)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), 3)
+
+    def test_expired_entry_is_evicted(self):
+        # Arrange
+        cache = ResultCache(max_entries=2, ttl_seconds=0)
+
+        # Act
+        cache.put("first", 1)
+
+        # Assert
+        self.assertIsNone(cache.get("first"))
+        self.assertEqual(cache.get_statistics(), {"hits": 0, "misses": 1, "size": 0})
+
+    def test_backend_is_shared(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache.sqlite")
+            first_cache = ResultCache(2, 60, SqliteCacheBackend(path, 2, 60))
+            second_cache = ResultCache(2, 60, SqliteCacheBackend(path, 2, 60))
+
+            # Act
+            first_cache.put("first", {"income": 10, "path": ["contract1"]})
+
+            # Assert
+            self.assertEqual(
+                second_cache.get("first"), {"income": 10, "path": ["contract1"]}
+            )
+
+    def test_backend_reconnects_after_fork(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SqliteCacheBackend(os.path.join(directory, "cache.sqlite"), 2, 60)
+            backend.put("first", {"income": 10, "path": ["contract1"]})
+            parent_connection = backend.connection
+
+            # Act
+            with mock.patch("lib.cache.os.getpid", return_value=-1):
+                value = backend.get("first")
+                child_connection = backend.connection
+
+            # Assert
+            self.assertEqual(value, {"income": 10, "path": ["contract1"]})
+            self.assertIsNot(child_connection, parent_connection)
+
+    def test_fingerprint_runs_off_the_event_loop(self):
+        # Arrange
+        client = TestClient(app)
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+        fingerprinted_on_loop = list()
+
+        def record_fingerprint(payload_columns):
+            try:
+                asyncio.get_running_loop()
+                fingerprinted_on_loop.append(True)
+            except RuntimeError:
+                fingerprinted_on_loop.append(False)
+            return fingerprint_payload(payload_columns)
+
+        # Act
+        with mock.patch("src.main.fingerprint_payload", record_fingerprint):
+            client.post("/spaceship/optimize", json=payload)
+            client.post("/spaceship/optimize/batch", json=[payload, payload])
+
+        # Assert
+        self.assertEqual(fingerprinted_on_loop, [False, False, False])
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+    def test_metrics_endpoint(self):
+        # Arrange
+        payload = {
+            "contracts_list": [
+                {"name": "metrics1", "start": 0, "duration": 5, "price": 10},
+                {"name": "metrics2", "start": 3, "duration": 7, "price": 14},
+            ]
+        }
+
+        # Act
+        with mock.patch("src.main.metrics_registry", MetricsRegistry()):
+            self.client.post("/spaceship/optimize", json=payload)
+            response: httpx.Response = self.client.get("/metrics")
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE spaceship_nodes_expanded_total counter", response.text)
+        self.assertIn("spaceship_nodes_expanded_total 2", response.text)
+        self.assertIn('spaceship_solves_total{solver="dp"} 1', response.text)
+        self.assertIn(
+            'spaceship_requests_total{path="/spaceship/optimize",status="200"} 1',
+            response.text,
+        )
+        for name in ["validation", "solve", "serialization"]:
+            self.assertIn(f"spaceship_{name}_seconds_count 1", response.text)
+
+    def test_requests_are_labelled_by_route(self):
+        # Arrange
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+
+        # Act
+        with mock.patch("src.main.metrics_registry", MetricsRegistry()):
+            for _ in range(2):
+                session_id = self.client.post(
+                    "/spaceship/sessions", json=payload
+                ).json()["session_id"]
+                self.client.delete(f"/spaceship/sessions/{session_id}")
+            self.client.get("/unknown/page1")
+            self.client.get("/unknown/page2")
+            response: httpx.Response = self.client.get("/metrics")
+
+        # Assert
+        self.assertIn(
+            'spaceship_requests_total{path="/spaceship/sessions/{session_id}",status="204"} 2',
+            response.text,
+        )
+        self.assertIn(
+            'spaceship_requests_total{path="unmatched",status="404"} 2', response.text
+        )
+        self.assertNotIn(session_id, response.text)
+        self.assertNotIn("/unknown", response.text)
+
+    def test_large_counters_keep_every_digit(self):
+        # Arrange
+        registry = MetricsRegistry()
+
+        # Act
+        registry.increment("spaceship_nodes_expanded_total", 1234568)
+        registry.increment("spaceship_contracts_removed_total", 0.5)
+        for _ in range(3):
+            registry.observe("spaceship_solve_seconds", 0.25)
+        rendered: str = registry.render()
+
+        # Assert
+        self.assertIn("spaceship_nodes_expanded_total 1234568\n", rendered)
+        self.assertIn("spaceship_contracts_removed_total 0.5\n", rendered)
+        self.assertIn("spaceship_solve_seconds_count 3\n", rendered)
+
+    def test_selected_solver_is_recorded(self):
+        # Arrange
+        with open("examples/challenge_100.json") as f:
+            payload = json.load(f)
+
+        # Act
+        with mock.patch("src.main.metrics_registry", MetricsRegistry()), mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+        ):
+            self.client.post("/spaceship/optimize", json=payload)
+            response: httpx.Response = self.client.get("/metrics")
+
+        # Assert
+        self.assertIn('spaceship_solves_total{solver="timeline"} 1', response.text)
+
+    def test_trace_header_is_opt_in(self):
+        # Arrange
+        payload = {
+            "contracts_list": [
+                {"name": "trace1", "start": 0, "duration": 5, "price": 10},
+                {"name": "trace2", "start": 3, "duration": 7, "price": 14},
+            ]
+        }
+
+        # Act
+        with mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+        ):
+            traced_response: httpx.Response = self.client.post(
+                "/spaceship/optimize",
+                headers={"X-Spaceship-Trace": "1"},
+                json=payload,
+            )
+            response: httpx.Response = self.client.post(
+                "/spaceship/optimize", json=payload
+            )
+
+        # Assert
+        trace = json.loads(traced_response.headers["X-Spaceship-Trace"])
+        self.assertEqual(
+            set(trace),
+            {
+                "validation_ms",
+                "solve_ms",
+                "serialization_ms",
+                "nodes_expanded",
+                "nodes_pruned_by_bound",
+                "nodes_rejected_by_overlap",
+                "contracts_removed",
+                "solvers",
+            },
+        )
+        self.assertEqual(trace["nodes_expanded"], 2)
+        self.assertEqual(trace["solvers"], {"dp": 1})
+        self.assertNotIn("X-Spaceship-Trace", response.headers)
+
+    def test_warm_up_is_recorded(self):
+        # Act
+        with TestClient(
+            app
+        ) as client:  # Entering the client runs the startup of the webserver
+            response: httpx.Response = client.get("/metrics")
+
+        # Assert
+        self.assertIn("spaceship_warm_up_seconds_count", response.text)
+
+    def test_metrics_are_aggregated_across_workers(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory)
+            other_worker = {
+                "counters": {"spaceship_nodes_expanded_total": 5},
+                "timer_counts": {"spaceship_solve_seconds": 1},
+                "timer_sums": {"spaceship_solve_seconds": 0.5},
+            }
+            with open(os.path.join(directory, "1.json"), "w") as f:
+                json.dump(other_worker, f)
+
+            # Act
+            registry.increment("spaceship_nodes_expanded_total", 3)
+            registry.observe("spaceship_solve_seconds", 0.25)
+            registry.flush()
+            snapshot = registry.collect()
+
+        # Assert
+        self.assertEqual(snapshot["counters"]["spaceship_nodes_expanded_total"], 8)
+        self.assertEqual(snapshot["timer_counts"]["spaceship_solve_seconds"], 2)
+        self.assertEqual(snapshot["timer_sums"]["spaceship_solve_seconds"], 0.75)
+
+    def test_requests_are_flushed_in_the_background(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            registry = MetricsRegistry(directory, flush_interval_seconds=60)
+            snapshot_path = os.path.join(directory, f"{os.getpid()}.json")
+            trace = RequestTrace()
+            trace.mark_validated()
+
+            # Act
+            registry.record_request("/spaceship/optimize", 200, trace)
+            flushed_by_request = os.path.exists(snapshot_path)
+            registry.close()
+            with open(snapshot_path) as f:
+                snapshot = json.load(f)
+
+        # Assert
+        self.assertFalse(flushed_by_request)
+        self.assertEqual(
+            snapshot["counters"],
+            {'spaceship_requests_total{path="/spaceship/optimize",status="200"}': 1},
+        )
+
+
+class TestBatchSolver(unittest.TestCase):
+    def setUp(self) -> None:
+        self.records = [
+            {
+                "contracts_list": [
+                    {"name": "batch1", "start": 0, "duration": 5, "price": 10},
+                    {"name": "batch2", "start": 3, "duration": 7, "price": 14},
+                ]
+            },
+            {
+                "contracts_list": [
+                    {"name": "batch3", "start": 0, "duration": 1, "price": 0}
+                ]
+            },
+            {
+                "contracts_list": [
+                    {"name": "batch4", "start": 0, "duration": 5, "price": 10},
+                    {"name": "batch5", "start": 5, "duration": 7, "price": 14},
+                ]
+            },
+        ]
+        self.expected_results = [
+            {"income": 14, "path": ["batch2"]},
+            {
+                "reason": "contracts_list: Value error, At least one contract should have a price of > 0."
+            },
+            {"reason": "JSON decode error: Expecting value: line 1 column 1 (char 0)"},
+            {"income": 24, "path": ["batch4", "batch5"]},
+        ]
+
+    def write_input(self, directory: str) -> str:
+        input_path = os.path.join(directory, "input.jsonl")
+        lines = [json.dumps(i) for i in self.records]
+        lines.insert(2, "not json")
+        with open(input_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return input_path
+
+    def read_output(
+        self, output_path: str
+    ) -> typing.List[typing.Dict[str, typing.Any]]:
+        with open(output_path) as f:
+            return [json.loads(i) for i in f]
+
+    def test_results_in_order(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = self.write_input(directory)
+            output_path = os.path.join(directory, "output.jsonl")
+
+            # Act
+            report = batch.run_batch(input_path, output_path, processes=2, chunk_size=1)
+            results = self.read_output(output_path)
+            checkpoint_exists = os.path.exists(f"{output_path}.checkpoint")
+
+        # Assert
+        self.assertEqual(results, self.expected_results)
+        self.assertEqual(report["records"], 4)
+        self.assertEqual(report["failures"], 2)
+        self.assertFalse(checkpoint_exists)
+
+    def test_resumes_from_checkpoint(self):
+        # Arrange
+        solve_chunk = batch.solve_chunk
+        solved_chunks = []
+
+        def interrupted_solve_chunk(*arguments):
+            if len(solved_chunks) == 2:
+                raise KeyboardInterrupt
+            solved_chunks.append(arguments)
+            return solve_chunk(*arguments)
+
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = self.write_input(directory)
+            output_path = os.path.join(directory, "output.jsonl")
+
+            # Act
+            with mock.patch("batch.solve_chunk", interrupted_solve_chunk):
+                with self.assertRaises(KeyboardInterrupt):
+                    batch.run_batch(input_path, output_path, processes=0, chunk_size=1)
+            interrupted_results = self.read_output(output_path)
+            report = batch.run_batch(input_path, output_path, processes=0, chunk_size=1)
+            results = self.read_output(output_path)
+
+        # Assert
+        self.assertEqual(interrupted_results, self.expected_results[:2])
+        self.assertEqual(results, self.expected_results)
+        self.assertEqual(report["records"], 2)
+        self.assertEqual(report["total_records"], 4)
+
+    def test_chunk_size_must_be_positive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = self.write_input(directory)
+            output_path = os.path.join(directory, "output.jsonl")
+
+            for chunk_size in [0, -1]:
+                with self.subTest(chunk_size=chunk_size):
+                    # Act & Assert
+                    with self.assertRaises(ValueError):
+                        batch.run_batch(
+                            input_path, output_path, processes=0, chunk_size=chunk_size
+                        )
+                    with self.assertRaises(argparse.ArgumentTypeError):
+                        batch.positive_int(str(chunk_size))
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = TestClient(app)
+
+    def test_profile_header_stores_profile_and_payload(self):
+        # Arrange
+        payload = {
+            "contracts_list": [
+                {"name": "profile1", "start": 0, "duration": 5, "price": 10},
+                {"name": "profile2", "start": 3, "duration": 7, "price": 14},
+            ]
+        }
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Act
+            with mock.patch(
+                "src.main.profile_spool", ProfileSpool(directory, 10**6)
+            ), mock.patch("src.main.metrics_registry", MetricsRegistry()):
+                response: httpx.Response = self.client.post(
+                    "/spaceship/optimize",
+                    headers={"X-Spaceship-Profile": "1"},
+                    json=payload,
+                )
+                unprofiled_response: httpx.Response = self.client.post(
+                    "/spaceship/optimize", json=payload
+                )
+                metrics_response: httpx.Response = self.client.get("/metrics")
+            name = response.headers["X-Spaceship-Profile"]
+            stats = pstats.Stats(os.path.join(directory, f"{name}.prof"))
+            spooled_payloads = list(read_spooled_payloads(directory))
+
+        # Assert
+        self.assertEqual(response.json(), {"income": 14, "path": ["profile2"]})
+        self.assertNotIn("X-Spaceship-Profile", unprofiled_response.headers)
+        self.assertGreater(stats.total_calls, 0)
+        self.assertEqual(len(spooled_payloads), 1)
+        spooled_name, spooled_payload = spooled_payloads[0]
+        self.assertEqual(spooled_name, name)
+        self.assertEqual(spooled_payload["contracts_list"], payload["contracts_list"])
+        self.assertEqual(spooled_payload["solver"], "dp")
+        self.assertIn("spaceship_profiles_total 1", metrics_response.text)
+
+    def test_spool_removes_oldest_profiles(self):
+        # Arrange
+        with tempfile.TemporaryDirectory() as directory:
+            spool = ProfileSpool(directory, max_bytes=2500)
+
+            # Act
+            names = [
+                spool.write(f"fingerprint{i}", bytes(1000), {"contracts_list": []})
+                for i in range(4)
+            ]
+            spooled_names = [name for name, _ in read_spooled_payloads(directory)]
+            remaining_files = sorted(os.listdir(directory))
+
+        # Assert
+        self.assertEqual(spooled_names, names[-2:])
+        self.assertEqual(len(remaining_files), 4)
+
+
+class TestSolverEngines(unittest.TestCase):
+    def test_engines_agree_on_sample_request(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+
+        # Act
+        dp_state = Manager(contracts, solver="dp").run()
+        bnb_state = Manager(contracts, solver="branch_and_bound").run()
+
+        # Assert
+        self.assertEqual(
+            [i.contract_name for i in dp_state.contracts],
+            [i.contract_name for i in bnb_state.contracts],
+        )
+        self.assertEqual(income_of(dp_state.contracts), 18)
+
+    def test_dp_prefers_the_schedule_that_ends_earliest(self):
+        # Arrange
+        contract_table = ContractTable.from_columns(
+            [10, 3, 3, 7, 7, 4, 10], [6, 2, 4, 6, 4, 3, 1], [5, 0, 1, 5, 3, 3, 1]
+        )
+
+        # Act
+        dp_state = Manager(contract_table, solver="dp").run()
+        bnb_state = Manager(contract_table, solver="branch_and_bound").run()
+
+        # Assert
+        self.assertEqual(
+            [i.contract_number for i in dp_state.contracts], [3, 5]
+        )  # Contract 3 ends at hour 13, before the equally priced contract 0
+        self.assertEqual(
+            [i.contract_number for i in bnb_state.contracts], [0, 5]
+        )  # The original engine favours the lowest contract numbers instead
+        self.assertEqual(income_of(dp_state.contracts), income_of(bnb_state.contracts))
+
+    def test_engines_agree_on_challenge_50(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_50.json")
+
+        # Act
+        dp_state = Manager(contracts, solver="dp").run()
+        bnb_state = Manager(contracts, solver="branch_and_bound").run()
+
+        # Assert
+        self.assertEqual(income_of(dp_state.contracts), income_of(bnb_state.contracts))
+        self.assertEqual(dp_state.upper, bnb_state.upper)
+
+    def test_min_cost_flow_engine_agrees_with_dp(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+
+        # Act
+        dp_state = Manager(contracts, solver="dp").run()
+        flow_state = Manager(contracts, solver="min_cost_flow").run()
+
+        # Assert
+        self.assertEqual(income_of(dp_state.contracts), income_of(flow_state.contracts))
+        self.assertEqual(len(dp_state.contracts), len(flow_state.contracts))
+
+    def test_dp_handles_large_payloads(self):
+        # Arrange
+        generator = random.Random(0)
+        contracts = [
+            Contract(
+                i,
+                f"contract{i}",
+                generator.randint(0, 10**6),
+                generator.randint(1, 1000),
+                generator.randint(0, 100),
+            )
+            for i in range(10**4)
+        ]
+
+        # Act
+        state = Manager(contracts).run()
+
+        # Assert
+        chosen = sorted(state.contracts, key=lambda x: x.duration_range[0])
+        for prior, subsequent in zip(chosen, chosen[1:]):
+            self.assertLessEqual(prior.duration_range[1], subsequent.duration_range[0])
+
+    def test_numpy_engine_agrees_with_dp(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+
+        # Act
+        dp_state = Manager(contracts, solver="dp").run()
+        manager = Manager(contracts, solver="numpy")
+        numpy_state = manager.run()
+
+        # Assert
+        self.assertTrue(manager.engine.vectorized)
+        self.assertEqual(
+            [i.contract_number for i in dp_state.contracts],
+            [i.contract_number for i in numpy_state.contracts],
+        )
+
+    def test_numpy_engine_falls_back_on_128_bit_values(self):
+        # Arrange
+        contracts = [
+            Contract(0, "contract1", 0, 2**100, 2**120),
+            Contract(1, "contract2", 2**100, 5, 2**120),
+            Contract(2, "contract3", 3, 2**100, 2**121),
+        ]
+
+        # Act
+        manager = Manager(contracts, solver="numpy")
+        state = manager.run()
+
+        # Assert
+        self.assertFalse(manager.engine.vectorized)
+        self.assertEqual(income_of(state.contracts), 2**121)
+        self.assertEqual([i.contract_name for i in state.contracts], ["contract3"])
+
+    def test_timeline_engine_agrees_with_dp(self):
+        # Arrange
+        generator = random.Random(0)
+        contract_tables = [
+            ContractTable.from_columns(
+                [generator.randint(0, 50) for _ in range(40)],
+                [generator.randint(1, 10) for _ in range(40)],
+                [generator.choice([0, 1, 5, 5, 10]) for _ in range(40)],
+            )
+            for _ in range(200)
+        ]
+
+        for contract_table in contract_tables:
+            # Act
+            dp_state = Manager(contract_table, solver="dp").run()
+            manager = Manager(contract_table, solver="timeline")
+            timeline_state = manager.run()
+
+            # Assert
+            self.assertTrue(manager.engine.discretized)
+            self.assertEqual(
+                dp_state.get_all_contract_numbers(),
+                timeline_state.get_all_contract_numbers(),
+            )
+
+    def test_timeline_engine_falls_back_on_long_horizons(self):
+        # Arrange
+        contracts = [
+            Contract(0, "contract1", 0, 2**100, 2**120),
+            Contract(1, "contract2", 2**100, 5, 2**120),
+            Contract(2, "contract3", 3, 2**100, 2**121),
+        ]
+
+        # Act
+        manager = Manager(contracts, solver="timeline")
+        state = manager.run()
+
+        # Assert
+        self.assertFalse(manager.engine.discretized)
+        self.assertEqual([i.contract_name for i in state.contracts], ["contract3"])
+
+    def test_auto_solver_selects_engine(self):
+        # Arrange
+        dense_contracts = load_contracts("examples/challenge_100.json")
+        sparse_contracts = load_contracts("examples/sample_request.json")
+
+        # Act
+        dense_manager = Manager(dense_contracts)
+        sparse_manager = Manager(sparse_contracts)
+        top_k_manager = Manager(dense_contracts, top_k=2)
+        fleet_manager = Manager(dense_contracts, ships=2)
+
+        # Assert
+        self.assertEqual(dense_manager.engine.name, "timeline")
+        self.assertEqual(sparse_manager.engine.name, "dp")
+        self.assertEqual(top_k_manager.engine.name, "dp")
+        self.assertEqual(fleet_manager.engine.name, "min_cost_flow")
+
+    def test_auto_solver_selects_numpy_for_large_sparse_tables(self):
+        # Arrange
+        total_contracts = NumpyEngine.min_auto_contracts
+        start_hours = [i * 100 for i in range(total_contracts)]
+        durations = [50] * total_contracts
+        large_table = ContractTable.from_columns(
+            start_hours, durations, [10] * total_contracts
+        )
+        small_table = ContractTable.from_columns(
+            start_hours[:-1], durations[:-1], [10] * (total_contracts - 1)
+        )
+        wide_table = ContractTable.from_columns(
+            start_hours, durations, [2**100] * total_contracts
+        )
+
+        # Act & Assert
+        self.assertEqual(Manager(large_table).engine.name, "numpy")
+        self.assertEqual(Manager(small_table).engine.name, "dp")
+        self.assertEqual(Manager(wide_table).engine.name, "dp")
+
+    def test_branch_and_bound_handles_128_bit_values(self):
+        # Arrange
+        contracts = [
+            Contract(0, "contract1", 0, 5, 2**128 - 2),
+            Contract(1, "contract2", 5, 5, 2**128 - 3),
+            Contract(2, "contract3", 3, 5, 2**128 - 2),
+        ]
+
+        # Act
+        state = Manager(contracts, solver="branch_and_bound").run()
+
+        # Assert
+        self.assertEqual(income_of(state.contracts), 2**129 - 5)
+
+    def test_best_first_engine_agrees_with_dp(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+
+        # Act
+        dp_state = Manager(contracts, solver="dp").run()
+        best_first_state = Manager(contracts, solver="best_first").run()
+
+        # Assert
+        self.assertEqual(
+            income_of(dp_state.contracts), income_of(best_first_state.contracts)
+        )
+        self.assertEqual(dp_state.upper, best_first_state.upper)
+
+    def test_search_engines_stop_when_budget_runs_out(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+        optimal_income = income_of(Manager(contracts).run().contracts)
+
+        for solver in ["branch_and_bound", "best_first"]:
+            with self.subTest(solver=solver):
+                # Act
+                manager = Manager(contracts, solver=solver)
+                state = manager.run(max_states=200)
+
+                # Assert
+                self.assertEqual(manager.engine.total_states_visited, 200)
+                self.assertFalse(manager.engine.optimality_proven)
+                self.assertGreaterEqual(
+                    income_of(state.contracts) + manager.engine.bound_gap,
+                    optimal_income,
+                )
+
+    def test_best_first_relaxation_stops_when_budget_runs_out(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_100.json")
+        optimal_income = income_of(Manager(contracts).run().contracts)
+
+        # Act
+        manager = Manager(contracts, solver="best_first")
+        state = manager.run(max_states=1)
+
+        # Assert
+        self.assertFalse(manager.engine.optimality_proven)
+        self.assertGreaterEqual(
+            income_of(state.contracts) + manager.engine.bound_gap, optimal_income
+        )
+
+    def test_search_engines_count_discarded_states(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+
+        for solver in ["branch_and_bound", "best_first"]:
+            with self.subTest(solver=solver):
+                # Act
+                manager = Manager(contracts, solver=solver)
+                manager.run()
+
+                # Assert
+                self.assertGreater(manager.engine.nodes_rejected_by_overlap, 0)
+                self.assertGreater(manager.engine.nodes_pruned_by_bound, 0)
+
+    def test_single_ship_solver_rejects_fleets(self):
+        with self.assertRaises(ValueError):
+            Manager(
+                load_contracts("examples/sample_request.json"), solver="dp", ships=2
+            )
+
+    def test_unknown_solver(self):
+        with self.assertRaises(ValueError):
+            Manager(load_contracts("examples/sample_request.json"), solver="unknown")
+
+
+class TestFuzz(unittest.TestCase):
+    def test_engines_agree_on_fuzzed_cases(self):
+        # Arrange
+        solvers = [i for i in SOLVER_ENGINES if i != "dp"]
+
+        # Act
+        report = fuzz.run_fuzz(
+            total_cases=5 * len(fuzz.SHAPES), seed=0, solvers=solvers, max_contracts=10
+        )
+
+        # Assert
+        self.assertEqual(report["mismatches"], [])
+        self.assertEqual(set(report["timings"]), {"dp", *solvers})
+
+    def test_mismatch_is_shrunk(self):
+        # Arrange
+        class EmptyScheduleEngine(SolverEngine):
+            name = "empty"
+
+            def solve(self, contract_table, conflict_index=None):
+                return State()
+
+        # Act
+        with mock.patch.dict(
+            "lib.classes.SOLVER_ENGINES", {"empty": EmptyScheduleEngine}
+        ):
+            report = fuzz.run_fuzz(
+                total_cases=1, seed=0, solvers=["empty"], max_contracts=10
+            )
+
+        # Assert
+        self.assertEqual(len(report["mismatches"]), 1)
+        mismatch = report["mismatches"][0]
+        self.assertEqual(len(mismatch["prices"]), 1)
+        self.assertTrue(mismatch["problem"].startswith("Income 0 instead of"))
+
+    def test_fleet_and_top_k_are_checked_by_brute_force(self):
+        # Arrange
+        class SingleScheduleEngine(DynamicProgrammingEngine):
+            name = "single"
+            supports_fleets = True
+
+            def solve(self, contract_table, conflict_index=None):
+                self.top_k = 1  # Ignoring the extra ships and schedules
+                return super().solve(contract_table, conflict_index)
+
+        # Act
+        with mock.patch.dict(
+            "lib.classes.SOLVER_ENGINES", {"single": SingleScheduleEngine}
+        ):
+            report = fuzz.run_fuzz(
+                total_cases=len(fuzz.SHAPES),
+                seed=0,
+                solvers=["single"],
+                max_contracts=8,
+            )
+
+        # Assert
+        mismatch_options = {
+            next(i for i in ["reduce", "ships", "top_k"] if i in mismatch)
+            for mismatch in report["mismatches"]
+        }
+        self.assertEqual(mismatch_options, {"ships", "top_k"})
+
+
+class TestComponents(unittest.TestCase):
+    def test_components_split_at_gaps(self):
+        # Arrange
+        start_hours = [10, 0, 4, 12, 20, 5]
+        end_hours = [15, 5, 6, 13, 21, 10]
+
+        # Act
+        components = find_components(start_hours, end_hours)
+
+        # Assert
+        self.assertEqual(components, [[1, 2, 5], [0, 3], [4]])
+        self.assertEqual(group_components(components, 2), [[1, 2, 5], [0, 3, 4]])
+
+    def test_merged_components_match_the_whole_problem(self):
+        # Arrange
+        generator = random.Random(2)
+        start_hours = [generator.randint(0, 2000) for _ in range(500)]
+        durations = [generator.randint(1, 8) for _ in range(500)]
+        prices = [generator.choice([0, 5, 10]) for _ in range(500)]
+        end_hours = [i + j for i, j in zip(start_hours, durations)]
+
+        # Act
+        groups = group_components(find_components(start_hours, end_hours), 3)
+        results = [
+            solve_contract_columns(
+                [start_hours[i] for i in group],
+                [durations[i] for i in group],
+                [prices[i] for i in group],
+            )
+            for group in groups
+        ]
+        merged_result = merge_solve_results(groups, results)
+
+        # Assert
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(
+            merged_result.contract_numbers,
+            solve_contract_columns(start_hours, durations, prices).contract_numbers,
+        )
+        self.assertEqual(merged_result.nodes_expanded, 500)
+
+    def test_endpoint_solves_components_concurrently(self):
+        # Arrange
+        client = TestClient(app)
+        payload = {
+            "contracts_list": [
+                {
+                    "name": f"contract{i}",
+                    "start": 1000 * (i // 5) + i % 5,
+                    "duration": 3,
+                    "price": i + 1,
+                }
+                for i in range(20)
+            ]
+        }  # Four components, the first one is short enough for the timeline engine
+        submitted_tasks = list()
+
+        def count_tasks(function, tasks, slots=1):
+            submitted_tasks.extend(tasks)
+            return submit_solver_tasks(function, tasks, slots)
+
+        # Act
+        with mock.patch("src.main.SOLVER_PROCESSES", 4), mock.patch(
+            "src.main.SPLIT_MIN_CONTRACTS", 0
+        ), mock.patch(
+            "src.main.result_cache", ResultCache(max_entries=0, ttl_seconds=0)
+        ), mock.patch(
+            "src.main.metrics_registry", MetricsRegistry()
+        ), mock.patch(
+            "src.main.submit_solver_tasks", side_effect=count_tasks
+        ):
+            response: httpx.Response = client.post("/spaceship/optimize", json=payload)
+            metrics_response: httpx.Response = client.get("/metrics")
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["path"],
+            [f"contract{i}" for i in [1, 4, 6, 9, 11, 14, 16, 19]],
+        )
+        self.assertEqual(len(submitted_tasks), 4)
+        self.assertIn(
+            'spaceship_solves_total{solver="timeline"} 1', metrics_response.text
+        )
+        self.assertIn('spaceship_solves_total{solver="dp"} 3', metrics_response.text)
+
+
+class TestContractReduction(unittest.TestCase):
+    def test_dominated_contracts_are_removed(self):
+        # Arrange
+        contract_table = ContractTable.from_contracts(
+            load_contracts("examples/sample_request.json")
+        )
+
+        # Act
+        reduction = reduce_contracts(contract_table)
+
+        # Assert
+        self.assertEqual(reduction.kept_rows, [0, 1, 2])
+        self.assertEqual(reduction.dominated_removed, 1)
+        self.assertEqual(reduction.total_removed, 1)
+        self.assertEqual(
+            [i.contract_name for i in reduction.contract_table],
+            ["contract1", "contract2", "contract3"],
+        )
+        self.assertEqual(
+            [i.contract_number for i in reduction.contract_table], [0, 1, 2]
+        )
+
+    def test_duplicates_and_zero_prices_are_removed(self):
+        # Arrange
+        contract_table = ContractTable.from_columns(
+            [0, 0, 0, 10, 10, 20], [5, 5, 5, 5, 8, 3], [7, 7, 0, 7, 7, 0]
+        )
+
+        # Act
+        reduction = reduce_contracts(contract_table)
+
+        # Assert
+        self.assertEqual(reduction.kept_rows, [0, 3])
+        self.assertEqual(reduction.zero_prices_removed, 2)
+        self.assertEqual(reduction.duplicates_removed, 1)
+        self.assertEqual(
+            reduction.dominated_removed, 1
+        )  # [10, 18] is as pricy as the narrower [10, 15]
+
+    def test_equal_prices_keep_the_contract_visited_first(self):
+        # Arrange
+        earlier_end = ContractTable.from_columns([0, 2], [10, 6], [5, 5])
+        wider_first = ContractTable.from_columns([0, 2], [10, 8], [5, 5])
+        narrower_first = ContractTable.from_columns([2, 0], [8, 10], [5, 5])
+
+        # Act & Assert
+        self.assertEqual(reduce_contracts(earlier_end).kept_rows, [1])
+        self.assertEqual(
+            reduce_contracts(wider_first).kept_rows, [0, 1]
+        )  # Same end hour, the wider contract has the lower contract number
+        self.assertEqual(reduce_contracts(narrower_first).kept_rows, [0])
+
+    def test_reduced_solves_match_the_unreduced_solves(self):
+        # Arrange
+        generator = random.Random(5)
+
+        for trial in range(200):
+            total_contracts = generator.randint(1, 12)
+            contracts = [
+                Contract(
+                    contract_number=i,
+                    contract_name=f"contract{i}",
+                    start_hour=generator.randint(0, 10),
+                    duration=generator.randint(1, 5),
+                    price=generator.choice([0, 1, 2, 3]),
+                )
+                for i in range(total_contracts)
+            ]
+
+            with self.subTest(trial=trial):
+                # Act
+                dp_state = Manager(contracts, solver="dp", reduce=False).run()
+                manager = Manager(contracts, solver="dp", reduce=True)
+                reduced_state = manager.run()
+                search_state = Manager(contracts, solver="best_first").run()
+
+                # Assert
+                self.assertEqual(
+                    reduced_state.get_all_contract_numbers(),
+                    dp_state.get_all_contract_numbers(),
+                )
+                self.assertEqual(reduced_state.upper, dp_state.upper)
+                self.assertEqual(
+                    income_of(search_state.contracts), income_of(dp_state.contracts)
+                )
+                self.assertEqual(
+                    manager.contracts_removed + len(manager.reduction.kept_rows),
+                    total_contracts,
+                )
+
+    def test_search_engines_solve_the_reduced_table(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+
+        for solver, contracts_removed in [("branch_and_bound", 0), ("best_first", 1)]:
+            with self.subTest(solver=solver):
+                # Act
+                result = solve_contract_columns(
+                    [i.duration_range[0] for i in contracts],
+                    [i.duration_range[1] - i.duration_range[0] for i in contracts],
+                    [i.penalty for i in contracts],
+                    solver=solver,
+                )
+
+                # Assert
+                self.assertEqual(result.contract_numbers, [0, 2])
+                self.assertEqual(result.contracts_removed, contracts_removed)
+
+    def test_reference_engine_keeps_its_path(self):
+        # Arrange
+        generator = random.Random(17)
+        tables = [
+            ContractTable.from_columns(
+                [7, 6, 0, 3, 0, 5], [4, 2, 4, 6, 3, 6], [2, 3, 2, 1, 2, 1]
+            )
+        ]
+        for _ in range(200):
+            total_contracts = generator.randint(1, 9)
+            tables.append(
+                ContractTable.from_columns(
+                    [generator.randint(0, 10) for _ in range(total_contracts)],
+                    [generator.randint(1, 6) for _ in range(total_contracts)],
+                    [generator.randint(0, 3) for _ in range(total_contracts)],
+                )
+            )
+
+        for trial, contract_table in enumerate(tables):
+            with self.subTest(trial=trial):
+                # Act
+                default_state = Manager(contract_table, solver="branch_and_bound").run()
+                unreduced_state = Manager(
+                    contract_table, solver="branch_and_bound", reduce=False
+                ).run()
+                reduced_state = Manager(
+                    contract_table, solver="branch_and_bound", reduce=True
+                ).run()
+
+                # Assert
+                self.assertEqual(
+                    default_state.get_all_contract_numbers(),
+                    unreduced_state.get_all_contract_numbers(),
+                )
+                self.assertEqual(
+                    income_of(reduced_state.contracts),
+                    income_of(unreduced_state.contracts),
+                )
+
+
+class TestFleets(unittest.TestCase):
+    def test_ships_fly_the_overlapping_contracts(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+
+        for ships, expected_income in [(1, 18), (2, 32), (3, 39), (10, 39)]:
+            with self.subTest(ships=ships):
+                # Act
+                manager = Manager(contracts, solver="min_cost_flow", ships=ships)
+                state = manager.run()
+
+                # Assert
+                self.assertEqual(income_of(state.contracts), expected_income)
+                self.assertEqual(
+                    sum(income_of(i) for i in manager.ship_paths), expected_income
+                )
+                self.assertLessEqual(len(manager.ship_paths), ships)
+
+    def test_fleet_matches_the_best_schedule_within_the_ship_limit(self):
+        # Arrange
+        generator = random.Random(11)
+
+        for trial in range(100):
+            total_contracts = generator.randint(1, 9)
+            ships = generator.randint(1, 3)
+            contracts = [
+                Contract(
+                    contract_number=i,
+                    contract_name=f"contract{i}",
+                    start_hour=generator.randint(0, 8),
+                    duration=generator.randint(1, 5),
+                    price=generator.randint(0, 5),
+                )
+                for i in range(total_contracts)
+            ]
+
+            ## Brute force over every subset where at most `ships` contracts overlap at any hour
+            best_income = 0
+            for chosen in itertools.product([False, True], repeat=total_contracts):
+                subset = [i for i, j in zip(contracts, chosen) if j]
+                if all(
+                    sum(
+                        1
+                        for i in subset
+                        if i.duration_range[0] <= j.duration_range[0]
+                        and j.duration_range[0] < i.duration_range[1]
+                    )
+                    <= ships
+                    for j in subset
+                ):
+                    best_income = max(best_income, income_of(subset))
+
+            with self.subTest(trial=trial):
+                # Act
+                manager = Manager(contracts, solver="min_cost_flow", ships=ships)
+                state = manager.run()
+
+                # Assert
+                self.assertEqual(income_of(state.contracts), best_income)
+                for path in manager.ship_paths:
+                    for previous, current in zip(path, path[1:]):
+                        self.assertLessEqual(
+                            previous.duration_range[1], current.duration_range[0]
+                        )
+
+    def test_merged_components_keep_the_ship_schedules(self):
+        # Arrange
+        generator = random.Random(4)
+        start_hours = [generator.randint(0, 300) for _ in range(200)]
+        durations = [generator.randint(1, 8) for _ in range(200)]
+        prices = [generator.randint(1, 10) for _ in range(200)]
+        end_hours = [i + j for i, j in zip(start_hours, durations)]
+
+        # Act
+        groups = group_components(find_components(start_hours, end_hours), 3)
+        merged_result = merge_solve_results(
+            groups,
+            [
+                solve_contract_columns(
+                    [start_hours[i] for i in group],
+                    [durations[i] for i in group],
+                    [prices[i] for i in group],
+                    solver="min_cost_flow",
+                    ships=2,
+                )
+                for group in groups
+            ],
+        )
+        whole_result = solve_contract_columns(
+            start_hours, durations, prices, solver="min_cost_flow", ships=2
+        )
+
+        # Assert
+        self.assertLessEqual(len(merged_result.ship_contract_numbers), 2)
+        self.assertEqual(
+            sorted(sum(merged_result.ship_contract_numbers, [])),
+            merged_result.contract_numbers,
+        )
+        self.assertEqual(
+            sum(prices[i] for i in merged_result.contract_numbers),
+            sum(prices[i] for i in whole_result.contract_numbers),
+        )
+
+
+class TestTopSchedules(unittest.TestCase):
+    def test_top_k_matches_every_schedule_ranked(self):
+        # Arrange
+        generator = random.Random(8)
+
+        for trial in range(100):
+            total_contracts = generator.randint(1, 9)
+            top_k = generator.randint(1, 6)
+            contracts = [
+                Contract(
+                    contract_number=i,
+                    contract_name=f"contract{i}",
+                    start_hour=generator.randint(0, 8),
+                    duration=generator.randint(1, 5),
+                    price=generator.randint(0, 5),
+                )
+                for i in range(total_contracts)
+            ]
+
+            ## Ranking every non overlapping subset by income, then by the number of contracts. Alternatives without
+            ## income are left out
+            ranked_keys = sorted(
+                (
+                    (-income_of(subset), len(subset))
+                    for chosen in itertools.product(
+                        [False, True], repeat=total_contracts
+                    )
+                    for subset in [[i for i, j in zip(contracts, chosen) if j]]
+                    if all(
+                        i.duration_range[1] <= j.duration_range[0]
+                        or j.duration_range[1] <= i.duration_range[0]
+                        for i, j in itertools.combinations(subset, 2)
+                    )
+                )
+            )
+
+            with self.subTest(trial=trial):
+                # Act
+                manager = Manager(contracts, top_k=top_k)
+                optimal_state = manager.run()
+                top_states = [optimal_state] + manager.get_alternative_states()
+
+                # Assert
+                self.assertEqual(
+                    [(-income_of(i.contracts), len(i.contracts)) for i in top_states],
+                    [
+                        key
+                        for position, key in enumerate(ranked_keys[:top_k])
+                        if position == 0 or key[0] < 0
+                    ],
+                )
+                self.assertEqual(
+                    len(set(i.chosen_mask for i in top_states)), len(top_states)
+                )
+                self.assertEqual(
+                    optimal_state.get_all_contract_numbers(),
+                    Manager(contracts).run().get_all_contract_numbers(),
+                )
+
+    def test_alternatives_in_response(self):
+        # Arrange
+        client = TestClient(app)
+        with open("examples/sample_request.json") as f:
+            payload = json.load(f)
+        payload["top_k"] = 3
+
+        # Act
+        response: httpx.Response = client.post("/spaceship/optimize", json=payload)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        expected_result = {
+            "income": 18,
+            "path": ["contract1", "contract3"],
+            "alternatives": [
+                {"income": 17, "path": ["contract1", "contract4"]},
+                {"income": 14, "path": ["contract2"]},
+            ],
+        }
+        self.assertEqual(expected_result, json.loads(response.content))
+
+    def test_alternatives_without_income_are_left_out(self):
+        # Arrange
+        client = TestClient(app)
+        payload = {
+            "contracts_list": [
+                {"name": "contract1", "start": 0, "duration": 5, "price": 10},
+                {"name": "contract2", "start": 5, "duration": 5, "price": 0},
+            ],
+            "top_k": 3,
+        }
+
+        # Act
+        response: httpx.Response = client.post("/spaceship/optimize", json=payload)
+
+        # Assert
+        self.assertEqual(response.status_code, 200)
+        expected_result = {
+            "income": 10,
+            "path": ["contract1"],
+            "alternatives": [{"income": 10, "path": ["contract1", "contract2"]}],
+        }
+        self.assertEqual(expected_result, json.loads(response.content))
+
+    def test_search_engines_reject_top_k(self):
+        with self.assertRaises(ValueError):
+            Manager(
+                load_contracts("examples/sample_request.json"),
+                solver="best_first",
+                top_k=2,
+            )
+
+
+class TestState(unittest.TestCase):
+    def test_add_contract_shares_parent_state(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+        initial_state = State()
+
+        # Act
+        first_state = initial_state.add_contract(contracts[0], upper=29, cost=0)
+        second_state = first_state.add_contract(contracts[2], upper=21, cost=14)
+
+        # Assert
+        self.assertIs(second_state.parent, first_state)
+        self.assertEqual(initial_state.contracts, [])
+        self.assertEqual(first_state.contracts, [contracts[0]])
+        self.assertEqual(second_state.contracts, [contracts[0], contracts[2]])
+        self.assertEqual(second_state.get_all_contract_numbers(), {0, 2})
+        self.assertEqual(second_state.get_max_contract_number(), 2)
+        self.assertEqual(second_state.chosen_mask, 0b101)
+
+    def test_add_contract_rejects_overlaps(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+        state = State().add_contract(contracts[0], upper=29, cost=0)
+
+        # Act
+        overlapping_state = state.add_contract(contracts[1], upper=15, cost=0)
+
+        # Assert
+        self.assertIsNone(overlapping_state)
+
+
+class TestContractTable(unittest.TestCase):
+    def test_rows_match_contracts(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+
+        # Act
+        contract_table = ContractTable.from_contracts(reversed(contracts))
+
+        # Assert
+        self.assertEqual(len(contract_table), len(contracts))
+        for contract, row in zip(contracts, contract_table):
+            self.assertEqual(row.contract_number, contract.contract_number)
+            self.assertEqual(row.contract_name, contract.contract_name)
+            self.assertEqual(row.duration_range, contract.duration_range)
+            self.assertEqual(row.penalty, contract.penalty)
+
+    def test_columns_keep_large_values_and_names(self):
+        # Act
+        contract_table = ContractTable.from_columns(
+            [0, 5], [5, 2**100], [2**120, 3], names=["éa", ""]
+        )
+
+        # Assert
+        self.assertEqual(contract_table[1].duration_range, (5, 5 + 2**100))
+        self.assertEqual(contract_table[0].penalty, 2**120)
+        self.assertEqual(contract_table[-2].contract_name, "éa")
+        self.assertEqual(contract_table[1].contract_name, "")
+        self.assertEqual(
+            ContractTable.from_columns([0], [1], [1])[0].contract_name, "0"
+        )
+        with self.assertRaises(IndexError):
+            contract_table[2]
+
+    def test_engines_accept_tables(self):
+        # Arrange
+        contracts = load_contracts("examples/challenge_50.json")
+        contract_table = ContractTable.from_contracts(contracts)
+
+        for solver in ["dp", "numpy", "best_first"]:
+            with self.subTest(solver=solver):
+                # Act
+                state = Manager(contract_table, solver=solver).run()
+
+                # Assert
+                self.assertEqual(
+                    sorted(state.get_all_contract_numbers()),
+                    sorted(Manager(contracts).run().get_all_contract_numbers()),
+                )
+                self.assertEqual(state.total_contracts, len(state.contracts))
+
+
+class TestConflictIndex(unittest.TestCase):
+    def test_conflict_masks(self):
+        # Arrange
+        contracts = load_contracts("examples/sample_request.json")
+
+        # Act
+        conflict_index = ConflictIndex(contracts)
+
+        # Assert
+        self.assertEqual(conflict_index.get_conflict_mask(0), 0b0010)
+        self.assertEqual(conflict_index.get_conflict_mask(1), 0b1101)
+        self.assertEqual(conflict_index.get_conflict_mask(2), 0b1010)
+        self.assertEqual(conflict_index.get_conflict_mask(3), 0b0110)
+
+    def test_touching_contracts_are_compatible(self):
+        # Arrange
+        contracts = [
+            Contract(0, "contract1", 0, 5, 10),
+            Contract(1, "contract2", 5, 5, 10),
+            Contract(2, "contract3", 4, 2, 10),
+        ]
+        conflict_index = ConflictIndex(contracts)
+
+        # Act & Assert
+        self.assertTrue(conflict_index.is_compatible(0b001, 1))
+        self.assertFalse(conflict_index.is_compatible(0b001, 2))
+        self.assertFalse(conflict_index.is_compatible(0b010, 2))
+
+
 if __name__ == "__main__":
     test_cases: typing.List = [
         TestSpaceshipOptimize,
+        TestSpaceshipOptimizeBatch,
+        TestSpaceshipOptimizeStream,
+        TestPayloadDecoding,
+        TestScheduleSessions,
+        TestResultCache,
+        TestMetrics,
+        TestBatchSolver,
+        TestProfiling,
+        TestSolverEngines,
+        TestFuzz,
+        TestComponents,
+        TestContractReduction,
+        TestFleets,
+        TestTopSchedules,
+        TestState,
+        TestContractTable,
+        TestConflictIndex,
     ]
 
     test_suites = [